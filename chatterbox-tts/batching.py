@@ -0,0 +1,192 @@
+"""Batched speech synthesis for several requests at once.
+
+``ChatterboxTTS.generate`` samples the speech tokens of one text at a time.
+``generate_batch`` samples the tokens of several texts in one T3 forward
+pass per step. Each text keeps its own voice, exaggeration, cfg and
+temperature. Each text's tokens are then rendered to audio with its own
+voice.
+"""
+
+from dataclasses import dataclass
+from typing import List
+
+import torch
+import torch.nn.functional as F
+from chatterbox.models.s3tokenizer import SPEECH_VOCAB_SIZE, drop_invalid_tokens
+from chatterbox.models.t3.modules.cond_enc import T3Cond
+from chatterbox.tts import ChatterboxTTS, Conditionals, punc_norm
+from transformers.generation.logits_process import (
+    MinPLogitsWarper,
+    RepetitionPenaltyLogitsProcessor,
+    TopPLogitsWarper,
+)
+
+# temperature=0 would divide the logits by zero; this is close to greedy
+MIN_TEMPERATURE = 1e-3
+
+
+@dataclass
+class SynthesisRequest:
+    text: str
+    conds: Conditionals
+    exaggeration: float = 0.5
+    cfg: float = 0.5
+    temperature: float = 0.8
+
+
+def _bos_embed(t3) -> torch.Tensor:
+    bos = torch.tensor([[t3.hp.start_speech_token]], device=t3.device)
+    return t3.speech_emb(bos) + t3.speech_pos_emb.get_fixed_embedding(0)
+
+
+def _prompt_embeds(model: ChatterboxTTS, request: SynthesisRequest) -> torch.Tensor:
+    """Input embeddings of a request, as ``ChatterboxTTS.generate`` builds them:
+    one row, or a conditional and an unconditional row when ``cfg > 0``."""
+    t3 = model.t3
+    # A new T3Cond, so the exaggeration does not change the cached voice
+    t3_cond = T3Cond(
+        speaker_emb=request.conds.t3.speaker_emb,
+        cond_prompt_speech_tokens=request.conds.t3.cond_prompt_speech_tokens,
+        emotion_adv=request.exaggeration * torch.ones(1, 1, 1),
+    ).to(device=model.device)
+
+    text_tokens = model.tokenizer.text_to_tokens(punc_norm(request.text))
+    text_tokens = text_tokens.to(model.device)
+    if request.cfg > 0:
+        text_tokens = torch.cat([text_tokens, text_tokens])
+    text_tokens = F.pad(text_tokens, (1, 0), value=t3.hp.start_text_token)
+    text_tokens = F.pad(text_tokens, (0, 1), value=t3.hp.stop_text_token)
+
+    embeds, _ = t3.prepare_input_embeds(
+        t3_cond=t3_cond,
+        text_tokens=text_tokens,
+        speech_tokens=t3.hp.start_speech_token * torch.ones_like(text_tokens[:, :1]),
+        cfg_weight=request.cfg,
+    )
+    if request.cfg > 0:
+        # T3.inference appends a second start-of-speech token under CFG
+        embeds = torch.cat([embeds, _bos_embed(t3).expand(2, -1, -1)], dim=1)
+    return embeds
+
+
+@torch.inference_mode()
+def sample_speech_tokens(
+    model: ChatterboxTTS,
+    requests: List[SynthesisRequest],
+    max_new_tokens: int = 1000,
+    repetition_penalty: float = 1.2,
+    min_p: float = 0.05,
+    top_p: float = 1.0,
+) -> List[torch.Tensor]:
+    """Sample the speech tokens of every request in one batched T3 decode.
+
+    The prompts are left-padded to a common length, so every row's newest
+    token is in the last position. A request with ``cfg > 0`` takes two rows,
+    and its logits are mixed as in ``T3.inference``. Requests that reach the
+    stop token keep decoding until every request has stopped, and their extra
+    tokens are discarded.
+    """
+    t3 = model.t3
+    device = t3.device
+    prompts = [_prompt_embeds(model, request) for request in requests]
+
+    # owner[row] is the request of each row; the conditional row comes first
+    owner = torch.tensor(
+        [i for i, prompt in enumerate(prompts) for _ in range(len(prompt))],
+        device=device,
+    )
+    cond_rows = torch.tensor(
+        [int((owner < i).sum()) for i in range(len(requests))], device=device
+    )
+    uncond_rows = cond_rows + torch.tensor(
+        [int(request.cfg > 0) for request in requests], device=device
+    )
+    cfg = torch.tensor([[max(request.cfg, 0.0)] for request in requests], device=device)
+    temperature = torch.tensor(
+        [[max(request.temperature, MIN_TEMPERATURE)] for request in requests],
+        device=device,
+    )
+
+    length = max(prompt.shape[1] for prompt in prompts)
+    inputs_embeds = torch.cat(
+        [F.pad(prompt, (0, 0, length - prompt.shape[1], 0)) for prompt in prompts]
+    )
+    attention_mask = torch.cat(
+        [
+            (torch.arange(length, device=device) >= length - prompt.shape[1])
+            .long()
+            .expand(len(prompt), -1)
+            for prompt in prompts
+        ]
+    )
+    position_ids = (attention_mask.cumsum(dim=1) - 1).clamp(min=0)
+
+    stop = t3.hp.stop_speech_token
+    generated = torch.full(
+        (len(requests), 1), t3.hp.start_speech_token, dtype=torch.long, device=device
+    )
+    lengths = torch.full((len(requests),), max_new_tokens, device=device)
+    stopped = torch.zeros(len(requests), dtype=torch.bool, device=device)
+    repetition = RepetitionPenaltyLogitsProcessor(penalty=float(repetition_penalty))
+    min_p_warper = MinPLogitsWarper(min_p=min_p)
+    top_p_warper = TopPLogitsWarper(top_p=top_p)
+
+    past_key_values = None
+    for step in range(max_new_tokens):
+        output = t3.tfmr(
+            inputs_embeds=inputs_embeds,
+            attention_mask=attention_mask,
+            position_ids=position_ids,
+            past_key_values=past_key_values,
+            use_cache=True,
+        )
+        past_key_values = output.past_key_values
+        logits = t3.speech_head(output.last_hidden_state[:, -1])
+        cond, uncond = logits[cond_rows], logits[uncond_rows]
+        logits = (cond + cfg * (cond - uncond)) / temperature
+
+        logits = repetition(generated, logits)
+        logits = min_p_warper(None, logits)
+        logits = top_p_warper(None, logits)
+        next_token = torch.multinomial(torch.softmax(logits, dim=-1), num_samples=1)
+        generated = torch.cat([generated, next_token], dim=1)
+
+        finished = (next_token[:, 0] == stop) & ~stopped
+        lengths[finished] = step + 1
+        stopped |= finished
+        if stopped.all():
+            break
+
+        next_embeds = t3.speech_emb(next_token)
+        next_embeds = next_embeds + t3.speech_pos_emb.get_fixed_embedding(step + 1)
+        inputs_embeds = next_embeds[owner]
+        attention_mask = F.pad(attention_mask, (0, 1), value=1)
+        position_ids = position_ids[:, -1:] + 1
+
+    speech_tokens = []
+    for tokens, n in zip(generated[:, 1:], lengths.tolist()):
+        tokens = drop_invalid_tokens(tokens[:n])
+        speech_tokens.append(tokens[tokens < SPEECH_VOCAB_SIZE])
+    return speech_tokens
+
+
+@torch.inference_mode()
+def generate_batch(
+    model: ChatterboxTTS, requests: List[SynthesisRequest]
+) -> List[torch.Tensor]:
+    """Synthesize every request and return one ``(1, samples)`` waveform per
+    request at ``model.sr``, watermarked like ``ChatterboxTTS.generate``.
+
+    The speech tokens are sampled in one batch. S3Gen's flow decoder only
+    takes one sequence at a time, so each request's tokens are then rendered
+    to audio with its own voice.
+    """
+    wavs = []
+    for request, tokens in zip(requests, sample_speech_tokens(model, requests)):
+        wav, _ = model.s3gen.inference(
+            speech_tokens=tokens.to(model.device), ref_dict=request.conds.gen
+        )
+        wav = wav.squeeze(0).detach().cpu().numpy()
+        wav = model.watermarker.apply_watermark(wav, sample_rate=model.sr)
+        wavs.append(torch.from_numpy(wav).unsqueeze(0))
+    return wavs
@@ -1,12 +1,15 @@
 import argparse
 import base64
+import struct
 import subprocess
 import sys
+import time
 from pathlib import Path
 
 import requests
 
 API_URL = "http://127.0.0.1:8000/speech"
+STREAM_URL = "http://127.0.0.1:8000/speech/stream"
 
 
 def play_audio(file_path):
@@ -29,12 +32,36 @@ def play_audio(file_path):
         )
 
 
+def stream_speech(data, output):
+    """Write streamed audio to ``output`` as it arrives."""
+    start = time.perf_counter()
+    with requests.post(STREAM_URL, json=data, stream=True) as response:
+        response.raise_for_status()
+        with open(output, "wb") as f:
+            for chunk in response.iter_content(chunk_size=None):
+                if f.tell() == 0:
+                    elapsed = time.perf_counter() - start
+                    print(f"⏱️ First audio after {elapsed:.2f}s")
+                f.write(chunk)
+
+            # The streamed header has no length, fill it in now that it is known
+            size = f.tell()
+            f.seek(4)
+            f.write(struct.pack("<I", size - 8))
+            f.seek(40)
+            f.write(struct.pack("<I", size - 44))
+    print(f"⏱️ Finished after {time.perf_counter() - start:.2f}s")
+
+
 def main():
     parser = argparse.ArgumentParser(description="Chatterbox TTS Client")
     parser.add_argument("--text", help="Text to synthesize")
     parser.add_argument(
         "--audio-prompt", help="Audio prompt file path for voice cloning (optional)"
     )
+    parser.add_argument(
+        "--voice-id", help="Id of a voice registered with /voices (optional)"
+    )
     parser.add_argument(
         "--output",
         "-o",
@@ -59,6 +86,11 @@ def main():
         default=0.8,
         help="Temperature (0.0-1.0, default: 0.8)",
     )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Stream the audio sentence by sentence as it is generated",
+    )
 
     args = parser.parse_args()
 
@@ -80,15 +112,20 @@ def main():
         audio_base64 = base64.b64encode(audio_data).decode("utf-8")
         data["audio_prompt"] = audio_base64
         print(f"🔊 Using voice from: {args.audio_prompt}")
+    elif args.voice_id:
+        data["voice_id"] = args.voice_id
 
     # Make API request
     try:
-        response = requests.post(API_URL, json=data)
-        response.raise_for_status()
+        if args.stream:
+            stream_speech(data, args.output)
+        else:
+            response = requests.post(API_URL, json=data)
+            response.raise_for_status()
 
-        # Save audio to file
-        with open(args.output, "wb") as f:
-            f.write(response.content)
+            # Save audio to file
+            with open(args.output, "wb") as f:
+                f.write(response.content)
 
         print(f"✅ Audio saved to: {args.output}")
 
@@ -0,0 +1,101 @@
+"""Reading voice prompts from URLs and base64 strings into memory."""
+
+import asyncio
+import base64
+import io
+import re
+import time
+from pathlib import Path
+from typing import Tuple
+
+import requests
+import soundfile as sf
+from fastapi import HTTPException
+from requests.adapters import HTTPAdapter
+
+
+def is_url(value: str) -> bool:
+    return re.match(r"^https?://", value) is not None
+
+
+def is_base64(value: str) -> bool:
+    # Basic base64 check
+    return re.match(r"^[A-Za-z0-9+/=]+\Z", value) is not None and len(value) > 100
+
+
+def check_audio(audio: bytes):
+    """Reject prompts that libsndfile cannot decode."""
+    try:
+        sf.info(io.BytesIO(audio))
+    except sf.SoundFileError as e:
+        raise HTTPException(
+            status_code=400, detail=f"audio_prompt is not a readable audio file: {e}"
+        )
+
+
+class PromptFetcher:
+    """Reads audio prompts into memory.
+
+    Downloads reuse connections from a pooled session, give up after
+    ``timeout`` (connect, read) or ``max_seconds`` in total, and are aborted
+    once they exceed ``max_bytes``. Failures are raised as HTTP errors.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 10 * 1024 * 1024,
+        timeout: Tuple[float, float] = (3.05, 10.0),
+        max_seconds: float = 30.0,
+        pool_size: int = 8,
+    ):
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.max_seconds = max_seconds
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def read(self, audio_prompt: str) -> bytes:
+        """Download or decode an audio prompt."""
+        if is_url(audio_prompt):
+            return self.download(audio_prompt)
+
+        if is_base64(audio_prompt):
+            self._check_size(len(audio_prompt) * 3 // 4)
+            padded = audio_prompt + "=" * (-len(audio_prompt) % 4)
+            return base64.b64decode(padded)
+
+        # Assume local file path
+        return Path(audio_prompt).read_bytes()
+
+    async def aread(self, audio_prompt: str) -> bytes:
+        """Like :meth:`read`, without blocking the event loop."""
+        return await asyncio.to_thread(self.read, audio_prompt)
+
+    def download(self, url: str) -> bytes:
+        deadline = time.monotonic() + self.max_seconds
+        try:
+            with self.session.get(url, stream=True, timeout=self.timeout) as resp:
+                resp.raise_for_status()
+                self._check_size(int(resp.headers.get("Content-Length", 0)))
+                buffer = bytearray()
+                for chunk in resp.iter_content(chunk_size=64 * 1024):
+                    buffer += chunk
+                    self._check_size(len(buffer))
+                    if time.monotonic() > deadline:
+                        raise HTTPException(
+                            status_code=408, detail="audio_prompt download timed out"
+                        )
+        except requests.RequestException as e:
+            raise HTTPException(
+                status_code=400, detail=f"Could not download audio_prompt: {e}"
+            )
+        return bytes(buffer)
+
+    def _check_size(self, size: int):
+        if size > self.max_bytes:
+            raise HTTPException(
+                status_code=413,
+                detail=f"audio_prompt is larger than {self.max_bytes} bytes",
+            )
@@ -1,134 +1,186 @@
-import base64
 import io
-import re
-import tempfile
-from typing import Optional, Tuple
+from pathlib import Path
+from typing import List, Literal, Optional, Tuple, Union
 
-import requests
 import torchaudio as ta
-from chatterbox.tts import ChatterboxTTS
-from fastapi.responses import Response
+from batching import SynthesisRequest, generate_batch
+from chatterbox.tts import ChatterboxTTS, Conditionals
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse, Response
 from litserve import LitAPI, LitServer
-from pydantic import BaseModel, Field, field_validator
+from prompts import PromptFetcher, check_audio, is_base64, is_url
+from pydantic import BaseModel, Field, field_validator, model_validator
+from streaming import split_sentences, to_pcm16, wav_header
+from voice_cache import VoiceCache, voice_id_for
 
 
-class TTSRequest(BaseModel):
+class VoiceRequest(BaseModel):
+    audio_prompt: str = Field(..., description="Base64 audio or URL")
+
+    @field_validator("audio_prompt")
+    def validate_audio_prompt(cls, v):
+        if v is None or is_url(v) or is_base64(v):
+            return v
+
+        raise ValueError("audio_prompt must be a base64 string or valid http/https URL")
+
+
+class TTSRequest(VoiceRequest):
     text: str = Field(
         ..., min_length=1, max_length=500, description="Input text to synthesize"
     )
     audio_prompt: Optional[str] = Field(
         None, description="Base64 audio, URL, or file path"
     )
+    voice_id: Optional[str] = Field(
+        None, pattern=r"^[0-9a-f]{64}$", description="Voice id from /voices"
+    )
     exaggeration: float = Field(0.5, ge=0.0, le=1.0)
     cfg: float = Field(0.5, ge=0.0, le=1.0)
     temperature: float = Field(0.8, ge=0.0, le=1.0)
 
-    @field_validator("audio_prompt")
-    def validate_audio_prompt(cls, v):
-        if v is None:
-            return v
-
-        is_url = re.match(r"^https?://", v)
-        is_base64 = (
-            re.match(r"^[A-Za-z0-9+/=]+\Z", v) and len(v) > 100
-        )  # Basic base64 check
+    @model_validator(mode="after")
+    def validate_voice(self):
+        if self.audio_prompt is not None and self.voice_id is not None:
+            raise ValueError("Pass either audio_prompt or voice_id, not both")
+        return self
 
-        if is_url or is_base64:
-            return v
-
-        raise ValueError("audio_prompt must be a base64 string or valid http/https URL")
 
-    def get_audio_tempfile(self) -> Optional[str]:
-        if self.audio_prompt is None:
-            return None
-
-        if re.match(r"^https?://", self.audio_prompt):
-            # Download from URL
-            resp = requests.get(self.audio_prompt)
-            resp.raise_for_status()
-            tmp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".wav")
-            tmp_file.write(resp.content)
-            tmp_file.close()
-            return tmp_file.name
-
-        if (
-            re.match(r"^[A-Za-z0-9+/=]+\Z", self.audio_prompt)
-            and len(self.audio_prompt) > 100
-        ):
-            # Base64 string
-            tmp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".wav")
-            padded = self.audio_prompt + "=" * (-len(self.audio_prompt) % 4)
-            decoded = base64.b64decode(padded)
-            tmp_file.write(decoded)
-            tmp_file.close()
-            return tmp_file.name
-
-        # Assume local file path
-        return self.audio_prompt
+class TTSStreamRequest(TTSRequest):
+    format: Literal["wav", "pcm"] = Field(
+        "wav", description="WAV stream, or raw 16-bit mono PCM at the model rate"
+    )
 
 
 class ChatterboxTTSAPI(LitAPI):
     """LitServe API for Chatterbox TTS model.
 
-    Supports both text-to-speech and voice cloning with audio prompts.
+    Supports both text-to-speech and voice cloning with audio prompts. The
+    voice conditioning extracted from a prompt is cached by the prompt's
+    content hash, and voices registered through ``/voices`` are stored in
+    ``voices_dir`` so that requests can refer to them by id. Prompts are read
+    into memory and never written to temporary files.
+
+    With ``max_batch_size > 1``, the speech tokens of concurrent requests are
+    sampled together, one T3 forward pass per step for the whole batch.
     """
 
+    def __init__(
+        self,
+        voices_dir: str = "voices",
+        max_voices: int = 64,
+        max_prompt_bytes: int = 10 * 1024 * 1024,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.voices_dir = Path(voices_dir)
+        self.max_voices = max_voices
+        self.prompt_fetcher = PromptFetcher(max_bytes=max_prompt_bytes)
+
     def setup(self, device):
         """Initialize the Chatterbox TTS model."""
         self.model = ChatterboxTTS.from_pretrained(device=device)
-        self.temp_files = []  # Track temp files for cleanup
-
-    def decode_request(self, request: TTSRequest) -> Tuple:
+        self.default_conds = self.model.conds  # Built-in voice
+        self.voice_cache = VoiceCache(max_voices=self.max_voices)
+
+    async def register_voice(self, request: VoiceRequest) -> dict:
+        """Store a voice prompt and return the id to synthesize it with."""
+        audio = await self.prompt_fetcher.aread(request.audio_prompt)
+        check_audio(audio)
+        voice_id = voice_id_for(audio)
+        path = self.voices_dir / f"{voice_id}.wav"
+        if not path.exists():
+            self.voices_dir.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(audio)
+        return {"voice_id": voice_id}
+
+    def decode_request(
+        self, request: TTSRequest
+    ) -> Union[SynthesisRequest, HTTPException]:
         """Decode request using TTSRequest model."""
-        audio_prompt_path = request.get_audio_tempfile()
-
-        # Track temp files for cleanup
-        if audio_prompt_path and audio_prompt_path != request.audio_prompt:
-            self.temp_files.append(audio_prompt_path)
-
-        return (
-            request.text,
-            audio_prompt_path,
-            request.exaggeration,
-            request.cfg,
-            request.temperature,
+        # Errors are returned rather than raised, so that LitServe does not
+        # fail the other requests of the batch
+        try:
+            conds = self.get_conditionals(request)
+        except HTTPException as e:
+            return e
+        return SynthesisRequest(
+            text=request.text,
+            conds=conds,
+            exaggeration=request.exaggeration,
+            cfg=request.cfg,
+            temperature=request.temperature,
         )
 
-    def predict(self, inputs: Tuple) -> bytes:
-        """Generate speech audio using Chatterbox TTS."""
-        text, audio_prompt_path, exaggeration, cfg, temperature = inputs
+    def get_conditionals(self, request: TTSRequest) -> Conditionals:
+        """Look up the voice of a request, extracting it on a cache miss."""
+        if request.voice_id is not None:
+            conds = self.voice_cache.get(request.voice_id)
+            if conds is None:
+                path = self.voices_dir / f"{request.voice_id}.wav"
+                if not path.is_file():
+                    raise HTTPException(
+                        status_code=404, detail=f"Unknown voice_id: {request.voice_id}"
+                    )
+                conds = self._extract_conditionals(path.read_bytes(), request)
+                self.voice_cache.put(request.voice_id, conds)
+            return conds
+
+        if request.audio_prompt is None:
+            return self.default_conds
+
+        url = request.audio_prompt if is_url(request.audio_prompt) else None
+        conds = self.voice_cache.get_url(url) if url else None
+        if conds is not None:
+            return conds
+
+        audio = self.prompt_fetcher.read(request.audio_prompt)
+        voice_id = voice_id_for(audio)
+        conds = self.voice_cache.get(voice_id)
+        if conds is None:
+            conds = self._extract_conditionals(audio, request)
+            self.voice_cache.put(voice_id, conds)
+        if url:
+            self.voice_cache.put_url(url, voice_id)
+        return conds
+
+    def _extract_conditionals(self, audio: bytes, request: TTSRequest) -> Conditionals:
+        check_audio(audio)
+        # librosa reads file-like objects, so the prompt never touches disk
+        self.model.prepare_conditionals(
+            io.BytesIO(audio), exaggeration=request.exaggeration
+        )
+        return self.model.conds
 
-        try:
-            wav = self.model.generate(
-                text,
-                audio_prompt_path=audio_prompt_path,
-                exaggeration=exaggeration,
-                cfg_weight=cfg,
-                temperature=temperature,
-            )
+    def batch(self, inputs: List) -> List:
+        return list(inputs)
+
+    def predict(self, x):
+        """Generate speech audio using Chatterbox TTS."""
+        batched = self.max_batch_size > 1
+        inputs = x if batched else self.batch([x])
+        outputs = list(inputs)
+        valid = [
+            i for i, item in enumerate(inputs) if not isinstance(item, HTTPException)
+        ]
+
+        wavs = generate_batch(self.model, [inputs[i] for i in valid]) if valid else []
+        for i, wav in zip(valid, wavs):
             # Convert to bytes
             buffer = io.BytesIO()
             ta.save(buffer, wav, self.model.sr, format="wav")
-            audio_bytes = buffer.getvalue()
-            return audio_bytes
-        finally:
-            # Clean up temp files
-            self._cleanup_temp_files()
-
-    def _cleanup_temp_files(self):
-        """Clean up temporary files."""
-        import os
-
-        for temp_file in self.temp_files:
-            try:
-                if os.path.exists(temp_file):
-                    os.unlink(temp_file)
-            except OSError:
-                pass
-        self.temp_files.clear()
-
-    def encode_response(self, output: bytes) -> Response:
+            outputs[i] = buffer.getvalue()
+        return outputs if batched else outputs[0]
+
+    def unbatch(self, output: List) -> List:
+        return output
+
+    def encode_response(self, output: Union[bytes, HTTPException]) -> Response:
         """Package the generated audio data into a response."""
+        if isinstance(output, HTTPException):
+            return JSONResponse(
+                status_code=output.status_code, content={"detail": output.detail}
+            )
         return Response(
             content=output,
             headers={
@@ -138,8 +190,49 @@ class ChatterboxTTSAPI(LitAPI):
         )
 
 
+class ChatterboxStreamingTTSAPI(ChatterboxTTSAPI):
+    """Synthesizes the text one sentence at a time and streams each
+    sentence's audio as soon as it is generated."""
+
+    def __init__(self, **kwargs):
+        super().__init__(stream=True, **kwargs)
+
+    def decode_request(self, request: TTSStreamRequest) -> Tuple:
+        synthesis = super().decode_request(request)
+        if isinstance(synthesis, HTTPException):
+            raise synthesis
+        return synthesis, request.format
+
+    def predict(self, inputs: Tuple):
+        synthesis, audio_format = inputs
+
+        # Sent with the first sentence, so the first chunk is playable audio
+        header = wav_header(self.model.sr) if audio_format == "wav" else b""
+        for sentence in split_sentences(synthesis.text):
+            self.model.conds = synthesis.conds
+            wav = self.model.generate(
+                sentence,
+                exaggeration=synthesis.exaggeration,
+                cfg_weight=synthesis.cfg,
+                temperature=synthesis.temperature,
+            )
+            yield header + to_pcm16(wav)
+            header = b""
+
+    def encode_response(self, output):
+        yield from output
+
+
 if __name__ == "__main__":
     # Set up API service and server
-    api = ChatterboxTTSAPI(api_path="/speech")
-    server = LitServer(api, accelerator="auto", timeout=100)
+    # Up to 4 concurrent /speech requests are synthesized as one batch
+    api = ChatterboxTTSAPI(api_path="/speech", max_batch_size=4, batch_timeout=0.05)
+    streaming_api = ChatterboxStreamingTTSAPI(api_path="/speech/stream")
+    server = LitServer(
+        [api, streaming_api],
+        accelerator="auto",
+        workers_per_device=1,
+        timeout=100,
+    )
+    server.app.add_api_route("/voices", api.register_voice, methods=["POST"])
     server.run(port=8000)
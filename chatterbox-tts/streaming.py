@@ -0,0 +1,61 @@
+"""Sentence splitting and incremental audio encoding for streamed speech."""
+
+import re
+import struct
+from typing import List
+
+import torch
+
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+")
+
+
+def split_sentences(text: str, min_chars: int = 20) -> List[str]:
+    """Split text after sentence-ending punctuation.
+
+    Sentences shorter than ``min_chars`` are joined with the next one, since
+    very short prompts synthesize with poor prosody.
+    """
+    sentences = []
+    pending = ""
+    for sentence in _SENTENCE_END.split(text.strip()):
+        pending = f"{pending} {sentence}" if pending else sentence
+        if len(pending) >= min_chars:
+            sentences.append(pending)
+            pending = ""
+    if pending:
+        if sentences:
+            sentences[-1] = f"{sentences[-1]} {pending}"
+        else:
+            sentences.append(pending)
+    return sentences
+
+
+def wav_header(sample_rate: int, channels: int = 1, bits: int = 16) -> bytes:
+    """WAV header for a stream of unknown length.
+
+    The RIFF and data sizes are set to the maximum value, which players treat
+    as "read until the end of the stream".
+    """
+    block_align = channels * bits // 8
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF",
+        0xFFFFFFFF,
+        b"WAVE",
+        b"fmt ",
+        16,
+        1,  # PCM
+        channels,
+        sample_rate,
+        sample_rate * block_align,
+        block_align,
+        bits,
+        b"data",
+        0xFFFFFFFF,
+    )
+
+
+def to_pcm16(wav: torch.Tensor) -> bytes:
+    """Convert float audio in ``[-1, 1]`` to little-endian 16-bit PCM."""
+    samples = (wav.squeeze(0).clamp(-1.0, 1.0) * 32767).to(torch.int16)
+    return samples.cpu().numpy().astype("<i2").tobytes()
@@ -0,0 +1,73 @@
+"""Load test for /speech at increasing concurrency.
+
+Reports requests per second, seconds of audio generated per second and
+p50/p95 latency for each concurrency level. Run from the chatterbox-tts
+folder with the server running:
+
+    python tests/load_test.py
+"""
+
+import concurrent.futures
+import io
+import os
+import time
+
+import requests
+import soundfile as sf
+
+SERVER_URL = os.getenv("SERVER_URL", "http://127.0.0.1:8000/speech")
+TEXTS = [
+    "Deploy any AI model, Lightning fast.",
+    "Focus on models, not serving infrastructure.",
+    "Streaming lets clients start playing audio while the rest is generated.",
+    "Thanks for calling, how can I help you today?",
+    "Your order has shipped and should arrive on Thursday.",
+    "Please hold while I transfer you to the next available agent.",
+]
+
+
+def send_request(text: str):
+    start_time = time.time()
+    try:
+        response = requests.post(SERVER_URL, json={"text": text})
+        status_code = response.status_code
+        audio_seconds = sf.info(io.BytesIO(response.content)).duration
+    except (requests.RequestException, sf.SoundFileError):
+        status_code, audio_seconds = 500, 0.0
+    return time.time() - start_time, status_code, audio_seconds
+
+
+def load_test(concurrency: int, requests_per_worker: int = 4) -> dict:
+    num_requests = concurrency * requests_per_worker
+    texts = [TEXTS[i % len(TEXTS)] for i in range(num_requests)]
+    start_time = time.time()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(send_request, texts))
+    total_time = time.time() - start_time
+
+    latencies = sorted(latency for latency, _, _ in results)
+    return {
+        "Concurrency": concurrency,
+        "Requests": num_requests,
+        "Failed": sum(status != 200 for _, status, _ in results),
+        "Req/s": num_requests / total_time,
+        "Audio s/s": sum(seconds for _, _, seconds in results) / total_time,
+        "P50 (s)": latencies[len(latencies) // 2],
+        "P95 (s)": latencies[int(len(latencies) * 0.95)],
+    }
+
+
+if __name__ == "__main__":
+    load_test(concurrency=2, requests_per_worker=1)  # warm up
+    header = None
+    for concurrency in (1, 2, 4, 8, 16):
+        result = load_test(concurrency)
+        if header is None:
+            header = "".join(f"{key:>12}" for key in result)
+            print(header)
+        print(
+            "".join(
+                f"{value:>12.2f}" if isinstance(value, float) else f"{value:>12}"
+                for value in result.values()
+            )
+        )
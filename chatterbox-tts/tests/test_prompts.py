@@ -0,0 +1,152 @@
+"""Tests for PromptFetcher against a local HTTP stand-in server.
+
+Run from the chatterbox-tts folder:
+
+    python -m pytest tests/test_prompts.py
+"""
+
+import asyncio
+import base64
+import io
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pytest
+import soundfile as sf
+from fastapi import HTTPException
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from prompts import PromptFetcher, check_audio
+
+
+def wav_bytes(seconds: float = 0.5, sample_rate: int = 16000) -> bytes:
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    buffer = io.BytesIO()
+    sf.write(buffer, 0.1 * np.sin(2 * np.pi * 440 * t), sample_rate, format="WAV")
+    return buffer.getvalue()
+
+
+WAV = wav_bytes()
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/voice.wav":
+            self.send_body(WAV, "audio/wav")
+        elif self.path == "/slow.wav":
+            time.sleep(1)
+            self.send_body(WAV, "audio/wav")
+        elif self.path == "/drip.wav":
+            # Each chunk arrives within the read timeout, but the whole
+            # download outlasts the overall deadline
+            self.send_response(200)
+            self.send_header("Content-Type", "audio/wav")
+            self.end_headers()
+            for _ in range(10):
+                self.wfile.write(b"\0" * 64)
+                self.wfile.flush()
+                time.sleep(0.1)
+        elif self.path == "/large.wav":
+            self.send_body(b"\0" * 4096, "audio/wav")
+        elif self.path == "/large-unsized.wav":
+            self.send_response(200)
+            self.send_header("Content-Type", "audio/wav")
+            self.end_headers()
+            self.wfile.write(b"\0" * 4096)
+        elif self.path == "/page.html":
+            self.send_body(b"<html>not audio</html>", "text/html")
+        else:
+            self.send_error(404)
+
+    def send_body(self, body: bytes, content_type: str):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def base_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def fetcher():
+    return PromptFetcher(max_bytes=len(WAV), timeout=(1, 0.3), max_seconds=0.5)
+
+
+def test_download(base_url, fetcher):
+    audio = fetcher.read(f"{base_url}/voice.wav")
+    assert audio == WAV
+    check_audio(audio)
+
+
+def test_aread(base_url, fetcher):
+    assert asyncio.run(fetcher.aread(f"{base_url}/voice.wav")) == WAV
+
+
+def test_base64(fetcher):
+    assert fetcher.read(base64.b64encode(WAV).decode("ascii")) == WAV
+
+
+def test_not_found(base_url, fetcher):
+    with pytest.raises(HTTPException) as error:
+        fetcher.read(f"{base_url}/missing.wav")
+    assert error.value.status_code == 400
+
+
+def test_unreachable(fetcher):
+    # Port 9 (discard) is not listening, so the connection is refused
+    with pytest.raises(HTTPException) as error:
+        fetcher.read("http://127.0.0.1:9/voice.wav")
+    assert error.value.status_code == 400
+
+
+def test_read_timeout(base_url, fetcher):
+    with pytest.raises(HTTPException) as error:
+        fetcher.read(f"{base_url}/slow.wav")
+    assert error.value.status_code == 400
+
+
+def test_overall_deadline(base_url):
+    fetcher = PromptFetcher(timeout=(1, 0.5), max_seconds=0.3)
+    with pytest.raises(HTTPException) as error:
+        fetcher.read(f"{base_url}/drip.wav")
+    assert error.value.status_code == 408
+
+
+@pytest.mark.parametrize("path", ["/large.wav", "/large-unsized.wav"])
+def test_oversized(base_url, path):
+    fetcher = PromptFetcher(max_bytes=1024, timeout=(1, 0.3))
+    with pytest.raises(HTTPException) as error:
+        fetcher.read(f"{base_url}{path}")
+    assert error.value.status_code == 413
+
+
+def test_oversized_base64():
+    fetcher = PromptFetcher(max_bytes=1024)
+    with pytest.raises(HTTPException) as error:
+        fetcher.read(base64.b64encode(WAV).decode("ascii"))
+    assert error.value.status_code == 413
+
+
+def test_not_audio(base_url, fetcher):
+    audio = fetcher.read(f"{base_url}/page.html")
+    with pytest.raises(HTTPException) as error:
+        check_audio(audio)
+    assert error.value.status_code == 400
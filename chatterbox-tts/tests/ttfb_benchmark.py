@@ -0,0 +1,51 @@
+"""Time to first audio of /speech and /speech/stream for a ~500-character text.
+
+Run from the chatterbox-tts folder with the server running:
+
+    python tests/ttfb_benchmark.py
+"""
+
+import os
+import statistics
+import time
+
+import requests
+
+SERVER_URL = os.getenv("SERVER_URL", "http://127.0.0.1:8000")
+TEXT = (
+    "Deploy any AI model, Lightning fast. Focus on models, not serving "
+    "infrastructure. LitServe handles batching, streaming and autoscaling, so "
+    "you can ship a production API in minutes. Bring your own model and "
+    "write a few lines of Python. Streaming lets clients start playing audio "
+    "while the rest of the answer is still being generated. That keeps voice "
+    "agents responsive, even for long replies. Try it with your own voice "
+    "prompt and compare the time to first audio against the full response."
+)
+
+
+def time_request(path: str):
+    """Return the seconds until the first audio bytes and until the end."""
+    start = time.perf_counter()
+    first = None
+    with requests.post(
+        f"{SERVER_URL}{path}", json={"text": TEXT}, stream=True
+    ) as response:
+        response.raise_for_status()
+        for chunk in response.iter_content(chunk_size=None):
+            if first is None and chunk:
+                first = time.perf_counter() - start
+    return first, time.perf_counter() - start
+
+
+def main(runs: int = 5):
+    print(f"Text length: {len(TEXT)} characters, {runs} runs")
+    time_request("/speech")  # Warm up
+    for path in ("/speech", "/speech/stream"):
+        results = [time_request(path) for _ in range(runs)]
+        first = statistics.median(first for first, _ in results)
+        total = statistics.median(total for _, total in results)
+        print(f"{path:<16} first audio: {first:6.2f}s  total: {total:6.2f}s")
+
+
+if __name__ == "__main__":
+    main()
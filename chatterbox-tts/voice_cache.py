@@ -0,0 +1,57 @@
+"""LRU cache of the voice conditioning derived from audio prompts."""
+
+import hashlib
+from collections import OrderedDict
+from typing import Optional
+
+from chatterbox.tts import Conditionals
+
+
+def voice_id_for(audio: bytes) -> str:
+    """Content hash that identifies a voice prompt."""
+    return hashlib.sha256(audio).hexdigest()
+
+
+class VoiceCache:
+    """Voice conditionals keyed by the content hash of their audio prompt.
+
+    URL prompts are also remembered by URL, so a repeated URL skips the
+    download as well as the conditioning extraction.
+
+    Args:
+        max_voices: Number of voices kept before the least recently used one
+            is evicted.
+        max_urls: Number of URL to voice id mappings kept.
+    """
+
+    def __init__(self, max_voices: int = 64, max_urls: int = 1024):
+        self.max_voices = max_voices
+        self.max_urls = max_urls
+        self._voices: "OrderedDict[str, Conditionals]" = OrderedDict()
+        self._urls: "OrderedDict[str, str]" = OrderedDict()
+
+    def get(self, voice_id: str) -> Optional[Conditionals]:
+        conds = self._voices.get(voice_id)
+        if conds is not None:
+            self._voices.move_to_end(voice_id)
+        return conds
+
+    def put(self, voice_id: str, conds: Conditionals):
+        self._voices[voice_id] = conds
+        self._voices.move_to_end(voice_id)
+        while len(self._voices) > self.max_voices:
+            self._voices.popitem(last=False)
+
+    def get_url(self, url: str) -> Optional[Conditionals]:
+        """Return the conditionals of a previously seen URL prompt."""
+        voice_id = self._urls.get(url)
+        if voice_id is None:
+            return None
+        self._urls.move_to_end(url)
+        return self.get(voice_id)
+
+    def put_url(self, url: str, voice_id: str):
+        self._urls[url] = voice_id
+        self._urls.move_to_end(url)
+        while len(self._urls) > self.max_urls:
+            self._urls.popitem(last=False)
@@ -46,6 +46,11 @@ def format_assistant_content(content):
     )
 
 
+def strip_thinking(content):
+    """Remove the <think>...</think> block from an assistant message."""
+    return re.sub(r"<think>.*?</think>", "", content, flags=re.DOTALL).strip()
+
+
 def display_chat_history(show_clear_button=False):
     """Display chat messages from session state."""
     for message in st.session_state.messages:
@@ -94,7 +99,15 @@ def main():
 
         # Get response from the assistant
         with st.chat_message("assistant"):
-            messages = [*st.session_state.messages]
+            # Earlier reasoning is not sent back, as recommended for
+            # DeepSeek-R1, which also keeps the prompt prefix stable across
+            # turns so the server can reuse its cached KV
+            messages = [
+                {**message, "content": strip_thinking(message["content"])}
+                if message["role"] == "assistant"
+                else message
+                for message in st.session_state.messages
+            ]
             stream = client.chat.completions.create(
                 model="deepseek-r1",
                 messages=messages,
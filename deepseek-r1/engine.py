@@ -0,0 +1,307 @@
+"""Continuous batching generation engine for causal language models."""
+
+import asyncio
+import logging
+import queue
+import threading
+from dataclasses import dataclass, field
+from typing import AsyncIterator, List, Optional
+
+import torch
+import torch.nn.functional as F
+from prefix_cache import PrefixCache
+from transformers import DynamicCache
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Sequence:
+    """A single generation request and its streaming state."""
+
+    input_ids: torch.Tensor
+    max_new_tokens: int
+    temperature: float
+    loop: asyncio.AbstractEventLoop
+    queue: asyncio.Queue
+    generated: List[int] = field(default_factory=list)
+    # Incremental detokenization window over ``generated``: text up to
+    # ``read_offset`` has been streamed, decoded from ``prefix_offset`` on
+    prefix_offset: int = 0
+    read_offset: int = 0
+    cached_tokens: int = 0
+    cancelled: bool = False
+
+    def put(self, item):
+        """Hand an item to the request's event loop from the engine thread."""
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, item)
+
+
+class ContinuousBatchingEngine:
+    """Token-level continuous batching on top of a Hugging Face causal LM.
+
+    A background thread owns the model. Each iteration it admits pending
+    requests into the running batch (prefilling each new prompt on its own),
+    runs one batched decode step for every active sequence, streams the new
+    text to each request's queue and evicts finished sequences. The KV caches
+    of all active sequences live in one left-padded cache, which is only
+    rebuilt when the batch membership changes.
+
+    Args:
+        model: A causal LM returning ``logits`` and ``past_key_values``.
+        tokenizer: The model's tokenizer, used to detokenize the stream.
+        max_batch_size: Maximum number of sequences decoded together.
+        prefix_cache: Optional cache of prompt KV reused across requests that
+            share a prefix, so that only the new tokens are prefilled.
+    """
+
+    def __init__(
+        self,
+        model,
+        tokenizer,
+        max_batch_size: int = 16,
+        prefix_cache: Optional[PrefixCache] = None,
+    ):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.max_batch_size = max_batch_size
+        self.prefix_cache = prefix_cache
+        self.device = model.device
+        self.eos_token_id = tokenizer.eos_token_id
+        self.top_p = getattr(model.generation_config, "top_p", None) or 1.0
+
+        self._pending: "queue.Queue[Sequence]" = queue.Queue()
+        self._active: List[Sequence] = []
+        self._cache = None
+        self._attention_mask: Optional[torch.Tensor] = None
+        self._next_tokens: Optional[torch.Tensor] = None
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    async def generate(
+        self,
+        input_ids: torch.Tensor,
+        max_new_tokens: int,
+        temperature: float,
+        usage: Optional[dict] = None,
+    ) -> AsyncIterator[str]:
+        """Queue a prompt for generation and yield its text as it is decoded.
+
+        If ``usage`` is given, it is filled with the token counts of the
+        request once generation finishes.
+        """
+        seq = Sequence(
+            input_ids=input_ids.reshape(1, -1),
+            max_new_tokens=max_new_tokens,
+            temperature=temperature,
+            loop=asyncio.get_running_loop(),
+            queue=asyncio.Queue(),
+        )
+        self._pending.put(seq)
+        try:
+            while True:
+                item = await seq.queue.get()
+                if item is None:
+                    if usage is not None:
+                        usage.update(
+                            prompt_tokens=seq.input_ids.shape[1],
+                            completion_tokens=len(seq.generated),
+                            cached_tokens=seq.cached_tokens,
+                        )
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            # Lets the engine evict the sequence if the consumer went away
+            seq.cancelled = True
+
+    def _run(self):
+        while True:
+            try:
+                self._admit()
+                if self._active:
+                    self._step()
+            except Exception as e:
+                logger.exception("Continuous batching step failed")
+                for seq in self._active:
+                    seq.put(e)
+                self._reset()
+
+    def _reset(self):
+        self._active = []
+        self._cache = None
+        self._attention_mask = None
+        self._next_tokens = None
+
+    def _admit(self):
+        """Prefill pending requests while there is room in the batch, blocking
+        when there is nothing else to do."""
+        while len(self._active) < self.max_batch_size:
+            try:
+                seq = self._pending.get(block=not self._active)
+            except queue.Empty:
+                return
+            if seq.cancelled:
+                continue
+            try:
+                self._prefill(seq)
+            except Exception as e:
+                logger.exception("Prefill failed")
+                seq.put(e)
+
+    @torch.inference_mode()
+    def _prefill(self, seq: Sequence):
+        input_ids = seq.input_ids.to(self.device)
+        cache = DynamicCache()
+        if self.prefix_cache is not None:
+            token_ids = seq.input_ids[0].tolist()
+            seq.cached_tokens, kv = self.prefix_cache.lookup(token_ids)
+            for layer_idx, (keys, values) in enumerate(kv):
+                cache.update(keys, values, layer_idx)
+
+        # Only the tokens after the cached prefix go through the model
+        outputs = self.model(
+            input_ids=input_ids[:, seq.cached_tokens :],
+            past_key_values=cache,
+            use_cache=True,
+        )
+        if self.prefix_cache is not None:
+            self.prefix_cache.insert(
+                token_ids,
+                [
+                    (layer.keys, layer.values)
+                    for layer in outputs.past_key_values.layers
+                ],
+            )
+        token = self._sample(outputs.logits[:, -1, :], [seq.temperature])
+
+        if self._emit(seq, int(token[0])):
+            return
+        self._merge(
+            outputs.past_key_values,
+            torch.ones_like(input_ids),
+            token[:, None],
+        )
+        self._active.append(seq)
+
+    @torch.inference_mode()
+    def _step(self):
+        """Decode one token for every active sequence."""
+        self._attention_mask = F.pad(self._attention_mask, (0, 1), value=1)
+        position_ids = self._attention_mask.sum(dim=1, keepdim=True) - 1
+        outputs = self.model(
+            input_ids=self._next_tokens,
+            attention_mask=self._attention_mask,
+            position_ids=position_ids,
+            past_key_values=self._cache,
+            use_cache=True,
+        )
+        self._cache = outputs.past_key_values
+        tokens = self._sample(
+            outputs.logits[:, -1, :], [seq.temperature for seq in self._active]
+        )
+        self._next_tokens = tokens[:, None]
+
+        keep = [
+            i
+            for i, (seq, token) in enumerate(zip(self._active, tokens.tolist()))
+            if not self._emit(seq, token)
+        ]
+        if len(keep) < len(self._active):
+            self._evict(keep)
+
+    def _sample(self, logits: torch.Tensor, temperatures: List[float]) -> torch.Tensor:
+        """Sample one token per row, greedily where the temperature is 0."""
+        temperature = torch.tensor(temperatures, device=logits.device)[:, None]
+        greedy = logits.argmax(dim=-1)
+        if not (temperature > 0).any():
+            return greedy
+
+        probs = torch.softmax(logits.float() / temperature.clamp(min=1e-5), dim=-1)
+        if self.top_p < 1.0:
+            sorted_probs, sorted_idx = probs.sort(dim=-1, descending=True)
+            outside = sorted_probs.cumsum(dim=-1) - sorted_probs > self.top_p
+            sorted_probs = sorted_probs.masked_fill(outside, 0.0)
+            probs = torch.zeros_like(probs).scatter(-1, sorted_idx, sorted_probs)
+        sampled = torch.multinomial(probs, num_samples=1).squeeze(-1)
+        return torch.where(temperature.squeeze(-1) > 0, sampled, greedy)
+
+    def _emit(self, seq: Sequence, token: int) -> bool:
+        """Stream the text added by ``token`` and report whether ``seq`` is
+        finished."""
+        finished = seq.cancelled or token == self.eos_token_id
+        if not finished:
+            seq.generated.append(token)
+            # Decode only the tokens since the last emitted text, plus the ones
+            # before them for context, so a step costs O(1) instead of O(n)
+            prefix_text = self.tokenizer.decode(
+                seq.generated[seq.prefix_offset : seq.read_offset],
+                skip_special_tokens=True,
+            )
+            text = self.tokenizer.decode(
+                seq.generated[seq.prefix_offset :], skip_special_tokens=True
+            )
+            # Hold back incomplete multi-byte characters until the next token
+            if not text.endswith("�") and len(text) > len(prefix_text):
+                seq.put(text[len(prefix_text) :])
+                seq.prefix_offset = seq.read_offset
+                seq.read_offset = len(seq.generated)
+            finished = len(seq.generated) >= seq.max_new_tokens
+
+        if finished:
+            seq.put(None)
+        return finished
+
+    def _merge(self, cache, attention_mask: torch.Tensor, next_tokens: torch.Tensor):
+        """Add a prefilled sequence to the batch, left-padding the shorter
+        of the two caches."""
+        if self._cache is None:
+            self._cache = cache
+            self._attention_mask = attention_mask
+            self._next_tokens = next_tokens
+            return
+
+        length = max(self._attention_mask.shape[1], attention_mask.shape[1])
+        for layer, new_layer in zip(self._cache.layers, cache.layers):
+            layer.keys = torch.cat(
+                [_left_pad(layer.keys, length), _left_pad(new_layer.keys, length)]
+            )
+            layer.values = torch.cat(
+                [_left_pad(layer.values, length), _left_pad(new_layer.values, length)]
+            )
+        self._attention_mask = torch.cat(
+            [
+                _left_pad(self._attention_mask, length),
+                _left_pad(attention_mask, length),
+            ]
+        )
+        self._next_tokens = torch.cat([self._next_tokens, next_tokens])
+
+    def _evict(self, keep: List[int]):
+        """Drop finished sequences and the padding columns nobody needs."""
+        self._active = [self._active[i] for i in keep]
+        if not keep:
+            self._reset()
+            return
+
+        index = torch.tensor(keep, device=self._attention_mask.device)
+        attention_mask = self._attention_mask.index_select(0, index)
+        start = int((attention_mask.sum(dim=0) == 0).long().cumprod(dim=0).sum())
+        for layer in self._cache.layers:
+            layer.keys = layer.keys.index_select(0, index)[:, :, start:]
+            layer.values = layer.values.index_select(0, index)[:, :, start:]
+        self._attention_mask = attention_mask[:, start:]
+        self._next_tokens = self._next_tokens.index_select(0, index)
+
+
+def _left_pad(tensor: torch.Tensor, length: int) -> torch.Tensor:
+    """Left-pad the sequence dimension of a mask (dim 1) or a KV tensor
+    (dim 2) with zeros."""
+    missing = length - tensor.shape[-2 if tensor.dim() == 4 else -1]
+    if missing == 0:
+        return tensor
+    if tensor.dim() == 4:
+        return F.pad(tensor, (0, 0, missing, 0))
+    return F.pad(tensor, (missing, 0))
@@ -0,0 +1,154 @@
+"""Prompt prefix KV cache with LRU eviction under a memory budget."""
+
+import hashlib
+import multiprocessing as mp
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import torch
+
+KVCache = List[Tuple[torch.Tensor, torch.Tensor]]
+
+
+class PrefixCacheStats:
+    """Prefix cache counters shared between the inference workers and the API
+    server.
+
+    The counters are created in the main process and inherited by the
+    workers, so the stats endpoint reports totals across all workers. They use
+    the spawn context because LitServe spawns its inference workers.
+    """
+
+    def __init__(self):
+        ctx = mp.get_context("spawn")
+        self._requests = ctx.Value("Q", 0)
+        self._hits = ctx.Value("Q", 0)
+        self._prompt_tokens = ctx.Value("Q", 0)
+        self._cached_tokens = ctx.Value("Q", 0)
+
+    def record(self, prompt_tokens: int, cached_tokens: int):
+        for counter, value in (
+            (self._requests, 1),
+            (self._hits, int(cached_tokens > 0)),
+            (self._prompt_tokens, prompt_tokens),
+            (self._cached_tokens, cached_tokens),
+        ):
+            if value:
+                with counter.get_lock():
+                    counter.value += value
+
+    def as_dict(self) -> dict:
+        requests = self._requests.value
+        prompt_tokens = self._prompt_tokens.value
+        cached_tokens = self._cached_tokens.value
+        return {
+            "requests": requests,
+            "hits": self._hits.value,
+            "hit_rate": self._hits.value / requests if requests else 0.0,
+            "prompt_tokens": prompt_tokens,
+            "prefill_tokens_saved": cached_tokens,
+            "token_hit_rate": cached_tokens / prompt_tokens if prompt_tokens else 0.0,
+        }
+
+
+@dataclass
+class _Entry:
+    kv: KVCache
+    hashes: List[str]
+    nbytes: int
+
+
+class PrefixCache:
+    """Past key/values of previous prompts, addressed by token-prefix hashes.
+
+    Prompts are split into blocks of ``block_size`` tokens and every block
+    boundary gets a hash chained over all tokens before it, so a new prompt
+    can reuse the KV of the longest block-aligned prefix it shares with any
+    cached prompt (a system prompt, or the earlier turns of a chat).
+
+    Args:
+        max_bytes: Memory budget for cached tensors; least recently used
+            prompts are evicted once it is exceeded.
+        block_size: Granularity, in tokens, at which prefixes are matched.
+        stats: Optional shared counters to update on every lookup.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 1024 * 1024 * 1024,
+        block_size: int = 16,
+        stats: Optional[PrefixCacheStats] = None,
+    ):
+        self.max_bytes = max_bytes
+        self.block_size = block_size
+        self.stats = stats
+        self.nbytes = 0
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._index: Dict[str, str] = {}  # block hash -> entry key
+
+    def _block_hashes(self, token_ids: List[int], length: int) -> List[str]:
+        hashes = []
+        digest = b""
+        for start in range(0, length, self.block_size):
+            block = array("q", token_ids[start : start + self.block_size])
+            digest = hashlib.sha256(digest + block.tobytes()).digest()
+            hashes.append(digest.hex())
+        return hashes
+
+    def lookup(self, token_ids: List[int]) -> Tuple[int, KVCache]:
+        """Return the number of cached prompt tokens and their key/values.
+
+        At least the last prompt token is always left uncached, since its
+        logits are needed to start generating.
+        """
+        length = (len(token_ids) - 1) // self.block_size * self.block_size
+        cached_tokens, kv = 0, []
+        for n, block_hash in reversed(
+            list(enumerate(self._block_hashes(token_ids, length), start=1))
+        ):
+            key = self._index.get(block_hash)
+            if key is not None:
+                self._entries.move_to_end(key)
+                cached_tokens = n * self.block_size
+                kv = [
+                    (k[:, :, :cached_tokens], v[:, :, :cached_tokens])
+                    for k, v in self._entries[key].kv
+                ]
+                break
+
+        if self.stats is not None:
+            self.stats.record(len(token_ids), cached_tokens)
+        return cached_tokens, kv
+
+    def insert(self, token_ids: List[int], kv: KVCache):
+        """Cache the key/values of the block-aligned part of a prompt."""
+        length = len(token_ids) // self.block_size * self.block_size
+        if length == 0:
+            return
+        hashes = self._block_hashes(token_ids, length)
+        key = hashes[-1]
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return
+
+        kv = [(k[:, :, :length].clone(), v[:, :, :length].clone()) for k, v in kv]
+        nbytes = sum(t.numel() * t.element_size() for layer in kv for t in layer)
+        if nbytes > self.max_bytes:
+            return
+
+        self._entries[key] = _Entry(kv=kv, hashes=hashes, nbytes=nbytes)
+        for block_hash in hashes:
+            self._index[block_hash] = key
+        self.nbytes += nbytes
+
+        while self.nbytes > self.max_bytes:
+            self._evict(next(iter(self._entries)))
+
+    def _evict(self, key: str):
+        entry = self._entries.pop(key)
+        self.nbytes -= entry.nbytes
+        for block_hash in entry.hashes:
+            if self._index.get(block_hash) == key:
+                del self._index[block_hash]
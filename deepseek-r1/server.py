@@ -1,31 +1,58 @@
-from threading import Thread
+import logging
+import uuid
 
 import litserve as ls
+from engine import ContinuousBatchingEngine
 from litserve.specs.openai import ChatCompletionRequest
-from transformers import (
-    AutoModelForCausalLM,
-    AutoTokenizer,
-    TextIteratorStreamer,
-)
+from prefix_cache import PrefixCache, PrefixCacheStats
+from transformers import AutoModelForCausalLM, AutoTokenizer
+
+logger = logging.getLogger(__name__)
 
 
 class DeepSeekR1API(ls.LitAPI):
+    """Chat API that decodes all concurrent requests of a worker in one
+    continuously batched generation loop."""
+
+    def __init__(
+        self,
+        max_num_sequences: int = 16,
+        prefix_cache_max_bytes: int = 1024 * 1024 * 1024,
+        **kwargs,
+    ):
+        # LitServe's request batching stays off; the engine batches per token
+        super().__init__(enable_async=True, **kwargs)
+        self.max_num_sequences = max_num_sequences
+        self.prefix_cache_max_bytes = prefix_cache_max_bytes
+        self.prefix_cache_stats = PrefixCacheStats()
+
     def setup(self, device):
         self.device = device
+        # Workers are spawned, so they need their own logging configuration
+        logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
 
         model_id = "deepseek-ai/DeepSeek-R1-Distill-Qwen-1.5B"
 
         self.tokenizer = AutoTokenizer.from_pretrained(model_id)
         self.model = AutoModelForCausalLM.from_pretrained(model_id).to(self.device)
 
-        self.streamer = TextIteratorStreamer(
+        prefix_cache = None
+        if self.prefix_cache_max_bytes > 0:
+            prefix_cache = PrefixCache(
+                max_bytes=self.prefix_cache_max_bytes, stats=self.prefix_cache_stats
+            )
+        self.engine = ContinuousBatchingEngine(
+            self.model,
             self.tokenizer,
-            skip_prompt=True,
-            skip_special_tokens=True,
-            clean_up_tokenization_spaces=True,
+            max_batch_size=self.max_num_sequences,
+            prefix_cache=prefix_cache,
         )
 
     def decode_request(self, request: ChatCompletionRequest, context: dict):
+        # Clients can set metadata.request_id to find their request in the logs
+        metadata = request.metadata or {}
+        context["request_id"] = metadata.get("request_id") or uuid.uuid4().hex[:8]
+
         # Update context with generation arguments
         context["generation_args"] = {
             "temperature": request.temperature or 0.6,
@@ -44,32 +71,43 @@ class DeepSeekR1API(ls.LitAPI):
             add_generation_prompt=True,
             return_tensors="pt",
             return_dict=True,
-        ).to(self.device)
-
-        # Return model inputs
-        return inputs
-
-    def predict(self, inputs: dict, context: dict):
-        generation_kwargs = dict(
-            **inputs,
-            streamer=self.streamer,
-            eos_token_id=self.tokenizer.eos_token_id,
-            pad_token_id=self.tokenizer.pad_token_id,
-            **context["generation_args"],
         )
-        # Start generation in a separate thread
-        generation_thread = Thread(target=self.model.generate, kwargs=generation_kwargs)
-        generation_thread.start()
 
-        # Yield generated text from the streamer
-        for text in self.streamer:
-            # print(f"\033[92m{text or ''}\033[0m", end="", flush=True)
+        # Return prompt token IDs
+        return inputs["input_ids"]
+
+    async def predict(self, input_ids, context: dict):
+        # Joins the running decode batch and streams this request's text
+        usage = {}
+        async for text in self.engine.generate(
+            input_ids, usage=usage, **context["generation_args"]
+        ):
             yield text
 
-        # Ensure the generation thread has finished
-        generation_thread.join()
+        # The OpenAI spec drops fields it does not know from usage, so the
+        # prompt tokens served from the prefix cache are logged per request
+        logger.info(
+            "request %s: %d of %d prompt tokens from the prefix cache, %d prefilled",
+            context["request_id"],
+            usage["cached_tokens"],
+            usage["prompt_tokens"],
+            usage["prompt_tokens"] - usage["cached_tokens"],
+        )
+        yield {
+            "role": "assistant",
+            "content": "",
+            "prompt_tokens": usage["prompt_tokens"],
+            "completion_tokens": usage["completion_tokens"],
+            "total_tokens": usage["prompt_tokens"] + usage["completion_tokens"],
+        }
 
 
 if __name__ == "__main__":
-    server = ls.LitServer(DeepSeekR1API(spec=ls.OpenAISpec()))
+    api = DeepSeekR1API(spec=ls.OpenAISpec(), max_num_sequences=16)
+    server = ls.LitServer(api)
+    server.app.add_api_route(
+        "/v1/chat/completions/prefix_cache/stats",
+        api.prefix_cache_stats.as_dict,
+        methods=["GET"],
+    )
     server.run(port=8000)
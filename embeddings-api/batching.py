@@ -0,0 +1,120 @@
+"""Helpers for grouping documents into sub-batches of similar work."""
+
+import time
+from queue import Empty
+from typing import List, Sequence
+
+import numpy as np
+from litserve.loops import BatchedLoop
+from litserve.loops.base import _SENTINEL_VALUE, _StopLoopError
+from litserve.utils import LitAPIStatus, LoopResponseType
+
+
+def token_lengths(tokenizer, documents: Sequence[str]) -> np.ndarray:
+    """Return the number of real (non-padding) tokens per document.
+
+    FastEmbed enables padding on its tokenizer, so ``len(encoding)`` would
+    report the padded length; the attention mask gives the true length.
+    """
+    encodings = tokenizer.encode_batch(list(documents))
+    return np.array([sum(encoding.attention_mask) for encoding in encodings])
+
+
+def length_buckets(lengths: np.ndarray, bucket_size: int) -> List[np.ndarray]:
+    """Split document indices, sorted by length, into buckets of at most
+    ``bucket_size``.
+
+    Each bucket holds documents of similar length, so padding to the longest
+    document in a bucket wastes little compute.
+    """
+    order = np.argsort(lengths, kind="stable")
+    return [order[i : i + bucket_size] for i in range(0, len(order), bucket_size)]
+
+
+def token_budget_buckets(lengths: np.ndarray, max_tokens: int) -> List[np.ndarray]:
+    """Split document indices, sorted by length, into buckets whose padded size
+    (``len(bucket) * longest document``) stays within ``max_tokens``.
+
+    A document longer than ``max_tokens`` gets a bucket of its own.
+    """
+    order = np.argsort(lengths, kind="stable")
+    buckets, start = [], 0
+    for end in range(1, len(order) + 1):
+        # lengths are sorted, so the last document is the longest in the bucket
+        if end < len(order) and (end + 1 - start) * lengths[order[end]] <= max_tokens:
+            continue
+        buckets.append(order[start:end])
+        start = end
+    return buckets
+
+
+class TokenBudgetLoop(BatchedLoop):
+    """Batched loop that admits requests by total work instead of request
+    count.
+
+    Requests are pulled from the queue until their combined cost, reported by
+    ``lit_api.request_cost(request)``, would exceed ``max_batch_tokens`` or
+    ``lit_api.batch_timeout`` expires. A request that does not fit is held
+    back and opens the next batch, so no request is ever dropped or reordered.
+    A single request larger than the budget is admitted on its own and is
+    expected to be split across several model calls in ``predict``.
+    """
+
+    def __init__(self, max_batch_tokens: int = 8192):
+        super().__init__()
+        self.max_batch_tokens = max_batch_tokens
+        self._held_back = None
+
+    def get_batch_requests(self, lit_api, request_queue, transport):
+        payloads, timed_out_uids = [], []
+        budget = self.max_batch_tokens
+        end_time = time.monotonic() + lit_api.batch_timeout
+        apply_timeout = lit_api.request_timeout not in (-1, False)
+
+        while budget > 0:
+            if self._held_back is not None:
+                payload, cost = self._held_back
+                self._held_back = None
+            else:
+                remaining_time = end_time - time.monotonic()
+                try:
+                    if remaining_time > 0:
+                        request_data = request_queue.get(
+                            timeout=min(remaining_time, 0.001)
+                        )
+                    else:
+                        request_data = request_queue.get_nowait()
+                except Empty:
+                    if remaining_time <= 0:
+                        break
+                    continue
+
+                if request_data == _SENTINEL_VALUE:
+                    raise _StopLoopError()
+
+                response_queue_id, uid, timestamp, x_enc = request_data
+                self.put_response(
+                    transport,
+                    response_queue_id,
+                    uid,
+                    (),
+                    LitAPIStatus.START,
+                    LoopResponseType.REGULAR,
+                )
+                if (
+                    apply_timeout
+                    and time.monotonic() - timestamp > lit_api.request_timeout
+                ):
+                    timed_out_uids.append((response_queue_id, uid))
+                    continue
+
+                payload = (response_queue_id, uid, x_enc)
+                cost = lit_api.request_cost(x_enc)
+
+            if payloads and cost > budget:
+                self._held_back = (payload, cost)
+                break
+            payloads.append(payload)
+            budget -= cost
+
+        return payloads, timed_out_uids
@@ -0,0 +1,187 @@
+"""Content-addressed embedding cache with LRU eviction and an optional disk
+tier."""
+
+import hashlib
+import multiprocessing as mp
+import os
+import tempfile
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so trivially different copies share a cache
+    entry."""
+    return " ".join(text.split())
+
+
+def cache_key(model_id: str, text: str) -> str:
+    """Hash of (model id, normalized text) used to address an embedding."""
+    payload = f"{model_id}\0{normalize_text(text)}".encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+class CacheStats:
+    """Hit/miss counters shared between the inference workers and the API
+    server.
+
+    The counters are created in the main process and inherited by the
+    workers, so the stats endpoint reports totals across all workers. They use
+    the spawn context because LitServe spawns its inference workers.
+    """
+
+    def __init__(self):
+        ctx = mp.get_context("spawn")
+        self._hits = ctx.Value("Q", 0)
+        self._disk_hits = ctx.Value("Q", 0)
+        self._misses = ctx.Value("Q", 0)
+
+    def record(self, hits: int = 0, disk_hits: int = 0, misses: int = 0):
+        for counter, value in (
+            (self._hits, hits),
+            (self._disk_hits, disk_hits),
+            (self._misses, misses),
+        ):
+            if value:
+                with counter.get_lock():
+                    counter.value += value
+
+    def as_dict(self) -> dict:
+        hits = self._hits.value + self._disk_hits.value
+        total = hits + self._misses.value
+        return {
+            "hits": hits,
+            "memory_hits": self._hits.value,
+            "disk_hits": self._disk_hits.value,
+            "misses": self._misses.value,
+            "hit_rate": hits / total if total else 0.0,
+        }
+
+
+class EmbeddingCache:
+    """LRU cache of embeddings bounded by a memory budget in bytes.
+
+    Args:
+        model_id: Model identifier mixed into every key.
+        max_bytes: Memory budget for cached vectors; least recently used
+            entries are evicted once it is exceeded.
+        cache_dir: Optional directory for an on-disk tier that survives
+            restarts. Each embedding is stored as ``<key>.npy``.
+        stats: Optional shared counters to update on every lookup.
+    """
+
+    def __init__(
+        self,
+        model_id: str,
+        max_bytes: int = 256 * 1024 * 1024,
+        cache_dir: Optional[str] = None,
+        stats: Optional[CacheStats] = None,
+    ):
+        self.model_id = model_id
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self.stats = stats
+        self.num_bytes = 0
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _put_memory(self, key: str, embedding: np.ndarray):
+        if embedding.nbytes > self.max_bytes:
+            return
+        if key in self._entries:
+            self.num_bytes -= self._entries.pop(key).nbytes
+        self._entries[key] = embedding
+        self.num_bytes += embedding.nbytes
+        while self.num_bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.num_bytes -= evicted.nbytes
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.npy")
+
+    def _get_disk(self, key: str) -> Optional[np.ndarray]:
+        try:
+            return np.load(self._disk_path(key))
+        except (OSError, ValueError):
+            return None
+
+    def _put_disk(self, key: str, embedding: np.ndarray):
+        # Write to a temp file first so concurrent workers never read a
+        # partially written entry.
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, embedding)
+            os.replace(tmp_path, self._disk_path(key))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        embedding = self._entries.get(key)
+        if embedding is not None:
+            self._entries.move_to_end(key)
+        return embedding
+
+    def put(self, key: str, embedding: np.ndarray):
+        # Embedders return rows of one batch array; a row view would keep the
+        # whole batch alive while only its own bytes are counted
+        embedding = np.array(embedding, dtype=embedding.dtype, copy=True)
+        self._put_memory(key, embedding)
+        if self.cache_dir:
+            self._put_disk(key, embedding)
+
+    def embed(
+        self,
+        documents: List[str],
+        embed_fn: Callable[[List[str]], List[np.ndarray]],
+    ) -> List[np.ndarray]:
+        """Return embeddings for ``documents``, embedding only the cache misses.
+
+        All misses (deduplicated) are passed to ``embed_fn`` in a single call
+        so partial hits still run as one batch.
+        """
+        keys = [cache_key(self.model_id, doc) for doc in documents]
+        results: List[Optional[np.ndarray]] = [None] * len(documents)
+        missing: Dict[str, List[int]] = {}
+        hits = disk_hits = 0
+
+        for i, key in enumerate(keys):
+            if key in missing:
+                missing[key].append(i)
+                continue
+
+            embedding = self.get(key)
+            if embedding is not None:
+                hits += 1
+            elif self.cache_dir:
+                embedding = self._get_disk(key)
+                if embedding is not None:
+                    self._put_memory(key, embedding)
+                    disk_hits += 1
+
+            if embedding is None:
+                missing[key] = [i]
+            else:
+                results[i] = embedding
+
+        if missing:
+            miss_docs = [normalize_text(documents[idx[0]]) for idx in missing.values()]
+            for (key, indices), embedding in zip(missing.items(), embed_fn(miss_docs)):
+                self.put(key, embedding)
+                for i in indices:
+                    results[i] = embedding
+
+        if self.stats is not None:
+            self.stats.record(
+                hits=hits,
+                disk_hits=disk_hits,
+                misses=sum(map(len, missing.values())),
+            )
+        return results
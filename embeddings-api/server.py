@@ -1,22 +1,55 @@
+from typing import Optional
+
+from cache import CacheStats, EmbeddingCache
 from fastembed import TextEmbedding
-from litserve import LitAPI, LitServer, OpenAIEmbeddingSpec
+from litserve import LitAPI, LitServer
+from litserve.specs.openai_embedding import EmbeddingRequest
+from spec import BinaryEmbeddingSpec
+
+MODEL_ID = "jinaai/jina-embeddings-v2-small-en"
 
 
 class EmbeddingAPI(LitAPI):
+    def __init__(
+        self,
+        cache_max_bytes: int = 256 * 1024 * 1024,
+        cache_dir: Optional[str] = None,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.cache_max_bytes = cache_max_bytes
+        self.cache_dir = cache_dir
+        # Created before the workers start so they all share the counters
+        self.cache_stats = CacheStats()
+
     def setup(self, device):
         cuda = "cuda" in device
         providers = ["CUDAExecutionProvider"] if cuda else None
         self.model = TextEmbedding(
-            "jinaai/jina-embeddings-v2-small-en",
+            MODEL_ID,
             providers=providers,
             cuda=cuda,
         )  # 512 dim, 0.120 GB
+        self.cache = EmbeddingCache(
+            MODEL_ID,
+            max_bytes=self.cache_max_bytes,
+            cache_dir=self.cache_dir,
+            stats=self.cache_stats,
+        )
+
+    def decode_request(self, request: EmbeddingRequest):
+        # The cache looks up each document, so a single string must not be
+        # iterated character by character
+        return request.ensure_list()
 
     def predict(self, documents):
-        return list(self.model.embed(documents))
+        return self.cache.embed(documents, lambda docs: list(self.model.embed(docs)))
 
 
 if __name__ == "__main__":
-    api = EmbeddingAPI(spec=OpenAIEmbeddingSpec())
+    api = EmbeddingAPI(spec=BinaryEmbeddingSpec())
     server = LitServer(api, accelerator="cpu")
+    server.app.add_api_route(
+        "/v1/embeddings/cache/stats", api.cache_stats.as_dict, methods=["GET"]
+    )
     server.run(port=8000, generate_client_file=False)
@@ -1,8 +1,16 @@
+from batching import length_buckets, token_lengths
 from fastembed import TextEmbedding
-from litserve import LitAPI, LitServer, OpenAIEmbeddingSpec
+from litserve import LitAPI, LitServer
+from litserve.specs.openai_embedding import EmbeddingRequest
+from spec import BinaryEmbeddingSpec
 
 
 class EmbeddingAPI(LitAPI):
+    def __init__(self, length_bucketing: bool = True, bucket_size: int = 32, **kwargs):
+        super().__init__(**kwargs)
+        self.length_bucketing = length_bucketing
+        self.bucket_size = bucket_size
+
     def setup(self, device):
         cuda = "cuda" in device
         providers = ["CUDAExecutionProvider"] if cuda else None
@@ -12,12 +20,30 @@ class EmbeddingAPI(LitAPI):
             cuda=cuda,
         )  # 512 dim, 0.120 GB
 
+    def embed_bucketed(self, documents):
+        """Embed documents in sub-batches of similar token length and scatter
+        the results back into the original order."""
+        lengths = token_lengths(self.model.model.tokenizer, documents)
+        embeddings = [None] * len(documents)
+        for bucket in length_buckets(lengths, self.bucket_size):
+            bucket_docs = [documents[i] for i in bucket]
+            bucket_embeddings = self.model.embed(bucket_docs, batch_size=len(bucket))
+            for i, embedding in zip(bucket, bucket_embeddings):
+                embeddings[i] = embedding
+        return embeddings
+
+    def decode_request(self, request: EmbeddingRequest):
+        return request.ensure_list()
+
     def predict(self, batch):
         # Flatten the batch_documents
         documents = [doc for docs in batch for doc in docs]
 
         # Embed the documents
-        embeddings = list(self.model.embed(documents))
+        if self.length_bucketing:
+            embeddings = self.embed_bucketed(documents)
+        else:
+            embeddings = list(self.model.embed(documents))
 
         # Group the embeddings back into the batch format
         start = 0
@@ -31,7 +57,7 @@ class EmbeddingAPI(LitAPI):
 
 if __name__ == "__main__":
     api = EmbeddingAPI(
-        spec=OpenAIEmbeddingSpec(),
+        spec=BinaryEmbeddingSpec(),
         max_batch_size=8,
         batch_timeout=0.1,
     )
@@ -0,0 +1,73 @@
+from batching import TokenBudgetLoop, token_budget_buckets, token_lengths
+from fastembed import TextEmbedding
+from litserve import LitAPI, LitServer
+from litserve.specs.openai_embedding import EmbeddingRequest
+from spec import BinaryEmbeddingSpec
+
+
+class EmbeddingAPI(LitAPI):
+    """Embeddings API that batches requests by token budget instead of request
+    count.
+
+    ``max_batch_size`` stays at 1 so the OpenAI spec accepts multi-input
+    requests; batching is done by ``TokenBudgetLoop``.
+    """
+
+    def __init__(self, max_batch_tokens: int = 8192, **kwargs):
+        super().__init__(loop=TokenBudgetLoop(max_batch_tokens), **kwargs)
+        self.max_batch_tokens = max_batch_tokens
+
+    def setup(self, device):
+        cuda = "cuda" in device
+        providers = ["CUDAExecutionProvider"] if cuda else None
+        self.model = TextEmbedding(
+            "jinaai/jina-embeddings-v2-small-en",
+            providers=providers,
+            cuda=cuda,
+        )  # 512 dim, 0.120 GB
+        self.tokenizer = self.model.model.tokenizer
+
+    def request_cost(self, request: EmbeddingRequest) -> int:
+        """Number of tokens a request adds to a batch, used by
+        TokenBudgetLoop."""
+        return int(token_lengths(self.tokenizer, request.ensure_list()).sum())
+
+    def decode_request(self, request: EmbeddingRequest):
+        return request.ensure_list()
+
+    def predict(self, batch):
+        # Flatten the batch_documents
+        documents = [doc for docs in batch for doc in docs]
+
+        # Embed in sub-batches whose padded size fits the token budget, which
+        # also splits oversized requests across several model calls
+        lengths = token_lengths(self.tokenizer, documents)
+        embeddings = [None] * len(documents)
+        for bucket in token_budget_buckets(lengths, self.max_batch_tokens):
+            bucket_docs = [documents[i] for i in bucket]
+            bucket_embeddings = self.model.embed(bucket_docs, batch_size=len(bucket))
+            for i, embedding in zip(bucket, bucket_embeddings):
+                embeddings[i] = embedding
+
+        # Group the embeddings back into the batch format
+        start = 0
+        result = []
+        for size in map(len, batch):
+            result.append(embeddings[start : start + size])
+            start += size
+
+        return result
+
+
+if __name__ == "__main__":
+    api = EmbeddingAPI(
+        spec=BinaryEmbeddingSpec(),
+        max_batch_tokens=8192,
+        batch_timeout=0.05,
+    )
+    server = LitServer(
+        api,
+        accelerator="cpu",
+        workers_per_device=2,
+    )
+    server.run(port=8000, generate_client_file=False)
@@ -1,6 +1,7 @@
 from fastembed import TextEmbedding
-from litserve import LitAPI, LitServer, OpenAIEmbeddingSpec
+from litserve import LitAPI, LitServer
 from litserve.specs.openai_embedding import EmbeddingRequest
+from spec import BinaryEmbeddingSpec
 
 
 class EmbeddingAPI(LitAPI):
@@ -30,6 +31,6 @@ class EmbeddingAPI(LitAPI):
 
 
 if __name__ == "__main__":
-    api = EmbeddingAPI(spec=OpenAIEmbeddingSpec())
+    api = EmbeddingAPI(spec=BinaryEmbeddingSpec())
     server = LitServer(api)
     server.run(port=8000, generate_client_file=False)
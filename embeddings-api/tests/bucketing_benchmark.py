@@ -0,0 +1,86 @@
+"""Benchmark length-bucketed batching against flatten-and-embed.
+
+Runs the batching server's ``predict`` in-process on a mixed-length workload
+(many short queries batched with a few long documents), so the numbers reflect
+model throughput without HTTP overhead.
+"""
+
+import logging
+import os
+import random
+import sys
+import time
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark import INPUT_TEXT
+from server_with_batching import EmbeddingAPI
+
+logging.basicConfig(level=logging.INFO)
+
+SHORT_QUERIES = [
+    "what is litserve",
+    "fastest way to serve embeddings",
+    "batching and streaming support",
+    "gpu autoscaling",
+]
+
+
+def make_workload(
+    num_batches: int = 20,
+    batch_size: int = 8,
+    inputs_per_request: int = 8,
+    long_ratio: float = 0.05,
+    seed: int = 0,
+) -> List[List[List[str]]]:
+    """Build LitServe-style batches of requests with mixed document
+    lengths."""
+    rng = random.Random(seed)
+    long_doc = INPUT_TEXT * 8  # truncated to the model's max length
+
+    def document():
+        return long_doc if rng.random() < long_ratio else rng.choice(SHORT_QUERIES)
+
+    return [
+        [[document() for _ in range(inputs_per_request)] for _ in range(batch_size)]
+        for _ in range(num_batches)
+    ]
+
+
+def run(api: EmbeddingAPI, workload, length_bucketing: bool) -> Dict[str, float]:
+    api.length_bucketing = length_bucketing
+    num_docs = sum(len(docs) for batch in workload for docs in batch)
+
+    api.predict(workload[0])  # warmup
+    start_time = time.perf_counter()
+    for batch in workload:
+        api.predict(batch)
+    elapsed = time.perf_counter() - start_time
+
+    return {
+        "Length Bucketing": length_bucketing,
+        "Documents": num_docs,
+        "Total Time (s)": elapsed,
+        "Documents Per Second": num_docs / elapsed,
+    }
+
+
+def main():
+    api = EmbeddingAPI()
+    api.setup("cpu")
+    workload = make_workload()
+
+    results = [run(api, workload, False), run(api, workload, True)]
+    for metrics in results:
+        logging.info("-" * 50)
+        for key, value in metrics.items():
+            logging.info(f"{key}: {value}")
+    logging.info("-" * 50)
+
+    speedup = results[1]["Documents Per Second"] / results[0]["Documents Per Second"]
+    print(f"Length bucketing speedup: {speedup:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
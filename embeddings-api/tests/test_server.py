@@ -0,0 +1,106 @@
+"""Tests for the embeddings servers, with a stand-in for the FastEmbed model.
+
+Run from the embeddings-api folder:
+
+    python -m pytest tests/test_server.py
+"""
+
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from litserve import LitServer
+from litserve.utils import wrap_litserve_start
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import server
+import server_with_batching
+from cache import EmbeddingCache
+from spec import BinaryEmbeddingSpec
+
+
+class StubTokenizer:
+    def encode_batch(self, documents):
+        return [SimpleNamespace(attention_mask=[1] * len(doc)) for doc in documents]
+
+
+class StubModel:
+    """Embeds each document as a vector filled with its length."""
+
+    def __init__(self):
+        self.model = SimpleNamespace(tokenizer=StubTokenizer())
+
+    def embed(self, documents, batch_size=None):
+        # FastEmbed wraps a single string into a list
+        if isinstance(documents, str):
+            documents = [documents]
+        for document in documents:
+            yield np.full(4, len(document), dtype=np.float32)
+
+
+class CachedEmbeddingAPI(server.EmbeddingAPI):
+    def setup(self, device):
+        self.model = StubModel()
+        self.cache = EmbeddingCache(server.MODEL_ID, stats=self.cache_stats)
+
+
+class BatchedEmbeddingAPI(server_with_batching.EmbeddingAPI):
+    def setup(self, device):
+        self.model = StubModel()
+
+
+def embed(client, documents):
+    response = client.post(
+        "/v1/embeddings", json={"input": documents, "model": server.MODEL_ID}
+    )
+    assert response.status_code == 200, response.text
+    return [item["embedding"] for item in response.json()["data"]]
+
+
+@pytest.fixture(scope="module")
+def client():
+    api = CachedEmbeddingAPI(spec=BinaryEmbeddingSpec())
+    with wrap_litserve_start(LitServer(api, accelerator="cpu")) as lit_server:
+        with TestClient(lit_server.app) as client:
+            yield client
+
+
+@pytest.fixture(scope="module")
+def batched_client():
+    api = BatchedEmbeddingAPI(
+        spec=BinaryEmbeddingSpec(), max_batch_size=8, batch_timeout=0.05
+    )
+    with wrap_litserve_start(LitServer(api, accelerator="cpu")) as lit_server:
+        with TestClient(lit_server.app) as client:
+            yield client
+
+
+def test_single_string(client):
+    assert embed(client, "hello world") == [[11.0] * 4]
+
+
+def test_list(client):
+    assert embed(client, ["hello", "hello world"]) == [[5.0] * 4, [11.0] * 4]
+
+
+def test_batched_single_string(batched_client):
+    assert embed(batched_client, "hello world") == [[11.0] * 4]
+
+
+def test_batched_concurrent_requests(batched_client):
+    inputs = ["a", ["hello", "hello world"], "three", ["xy"] * 3]
+    with ThreadPoolExecutor(len(inputs)) as pool:
+        results = list(
+            pool.map(lambda documents: embed(batched_client, documents), inputs)
+        )
+    assert results == [
+        [[1.0] * 4],
+        [[5.0] * 4, [11.0] * 4],
+        [[5.0] * 4],
+        [[2.0] * 4] * 3,
+    ]
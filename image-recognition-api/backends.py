@@ -0,0 +1,150 @@
+"""Execution backends for the ResNet-50 classifier.
+
+Every backend is called with a normalized NCHW float batch and returns the
+pooled features and the class logits as torch tensors.
+"""
+
+import os
+import tempfile
+from pathlib import Path
+from typing import Tuple
+
+import onnxruntime as ort
+import torch
+from onnxruntime.quantization import QuantType, quantize_dynamic
+
+BACKENDS = ("torch", "torchscript", "onnx", "onnx-int8")
+
+
+class FeaturesAndLogits(torch.nn.Module):
+    """A classifier split into its pooled backbone and final linear layer."""
+
+    def __init__(self, backbone: torch.nn.Module, classifier: torch.nn.Module):
+        super().__init__()
+        self.backbone = backbone
+        self.classifier = classifier
+
+    def forward(self, images: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
+        features = self.backbone(images)
+        return features, self.classifier(features)
+
+
+class TorchBackend:
+    """Eager PyTorch, or a frozen TorchScript trace of it."""
+
+    def __init__(self, model: FeaturesAndLogits, device, script: bool = False):
+        self.model = model.to(device).eval()
+        if script:
+            example = torch.randn(1, 3, 224, 224, device=device)
+            with torch.inference_mode():
+                traced = torch.jit.trace(self.model, example)
+            self.model = torch.jit.optimize_for_inference(torch.jit.freeze(traced))
+
+    def __call__(self, images: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
+        with torch.inference_mode():
+            return self.model(images)
+
+
+class OnnxBackend:
+    """ONNX Runtime on CPU, with an optional dynamic int8 quantized model.
+
+    The model is exported once to ``cache_dir`` under ``name``, and the file
+    is reused by later workers and restarts.
+
+    Args:
+        intra_op_threads: Threads used inside each operator; 0 lets ONNX
+            Runtime use one per physical core. Lower it when several workers
+            share the CPU.
+        inter_op_threads: Threads used to run independent operators in
+            parallel; ResNet-50 is a chain, so one is enough.
+    """
+
+    def __init__(
+        self,
+        model: FeaturesAndLogits,
+        cache_dir: str,
+        name: str,
+        quantize: bool = False,
+        intra_op_threads: int = 0,
+        inter_op_threads: int = 1,
+    ):
+        path = export_onnx(model, Path(cache_dir) / f"{name}.onnx")
+        if quantize:
+            path = quantize_onnx(path, Path(cache_dir) / f"{name}-int8.onnx")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = inter_op_threads
+        self.session = ort.InferenceSession(
+            str(path), options, providers=["CPUExecutionProvider"]
+        )
+
+    def __call__(self, images: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
+        features, logits = self.session.run(
+            ["features", "logits"], {"images": images.cpu().numpy()}
+        )
+        return torch.from_numpy(features), torch.from_numpy(logits)
+
+
+def _atomic_path(path: Path) -> Path:
+    """Temporary path next to ``path``, so workers exporting at the same time
+    never read a half-written file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=path.suffix)
+    os.close(fd)
+    os.chmod(tmp_path, 0o644)
+    return Path(tmp_path)
+
+
+def export_onnx(model: FeaturesAndLogits, path: Path) -> Path:
+    if path.exists():
+        return path
+    tmp_path = _atomic_path(path)
+    torch.onnx.export(
+        model.cpu().eval(),
+        torch.randn(1, 3, 224, 224),
+        str(tmp_path),
+        input_names=["images"],
+        output_names=["features", "logits"],
+        dynamic_axes={name: {0: "batch"} for name in ("images", "features", "logits")},
+        opset_version=17,
+        dynamo=False,
+    )
+    os.replace(tmp_path, path)
+    return path
+
+
+def quantize_onnx(path: Path, quantized_path: Path) -> Path:
+    if quantized_path.exists():
+        return quantized_path
+    tmp_path = _atomic_path(quantized_path)
+    # ConvInteger only takes unsigned 8-bit weights
+    quantize_dynamic(path, tmp_path, weight_type=QuantType.QUInt8)
+    os.replace(tmp_path, quantized_path)
+    return quantized_path
+
+
+def load_backend(
+    name: str,
+    model: FeaturesAndLogits,
+    device,
+    cache_dir: str,
+    cache_key: str,
+    intra_op_threads: int = 0,
+):
+    """Build the backend called ``name`` (one of :data:`BACKENDS`)."""
+    if name == "torch":
+        return TorchBackend(model, device)
+    if name == "torchscript":
+        return TorchBackend(model, device, script=True)
+    if name in ("onnx", "onnx-int8"):
+        return OnnxBackend(
+            model,
+            cache_dir,
+            cache_key,
+            quantize=name == "onnx-int8",
+            intra_op_threads=intra_op_threads,
+        )
+    raise ValueError(f"Unknown backend {name!r}, expected one of {BACKENDS}")
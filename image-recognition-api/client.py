@@ -15,6 +15,19 @@ def parse_arguments():
         required=True,
         help="Path to the image file to send to the server.",
     )
+    parser.add_argument(
+        "-k",
+        "--top-k",
+        type=int,
+        default=1,
+        help="Number of top classes to return.",
+    )
+    parser.add_argument(
+        "-e",
+        "--embedding",
+        action="store_true",
+        help="Also return the image embedding.",
+    )
     return parser.parse_args()
 
 
@@ -25,11 +38,12 @@ def check_image_file(image_path):
     return True
 
 
-def send_image_to_server(image_path, url):
+def send_image_to_server(image_path, url, top_k=1, embedding=False):
     try:
         with open(image_path, "rb") as image_file:
             files = {"request": image_file}
-            response = requests.post(url, files=files)
+            data = {"top_k": top_k, "embedding": str(embedding).lower()}
+            response = requests.post(url, files=files, data=data)
 
         if response.status_code == 200:
             logging.info("Result: %s", response.json())
@@ -45,7 +59,7 @@ def main():
 
     if check_image_file(args.image):
         API_URL = "http://localhost:8000/predict"
-        send_image_to_server(args.image, API_URL)
+        send_image_to_server(args.image, API_URL, args.top_k, args.embedding)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,50 @@
+"""Image decoding and normalization for batched classification."""
+
+import io
+
+import numpy as np
+import torch
+from PIL import Image
+
+
+def load_image(data: bytes, resize_size: int, crop_size: int) -> np.ndarray:
+    """Decode an image to a center-cropped ``(crop_size, crop_size, 3)`` uint8
+    array.
+
+    Matches the resize and crop of torchvision's ``ImageClassification``
+    preset, but JPEGs are downscaled while decoding (``Image.draft``) when they
+    are at least twice the target size, which skips most of the decoding work
+    for large photos.
+    """
+    with Image.open(io.BytesIO(data)) as img:
+        img.draft("RGB", (resize_size, resize_size))
+        image = img.convert("RGB")
+
+    width, height = image.size
+    if width <= height:
+        size = (resize_size, int(resize_size * height / width))
+    else:
+        size = (int(resize_size * width / height), resize_size)
+    image = image.resize(size, Image.BILINEAR)
+
+    left = int(round((size[0] - crop_size) / 2.0))
+    top = int(round((size[1] - crop_size) / 2.0))
+    image = image.crop((left, top, left + crop_size, top + crop_size))
+    return np.asarray(image)
+
+
+class Normalize:
+    """Converts a batch of HWC uint8 images to normalized NCHW float tensors.
+
+    The images are moved to the device as uint8, a quarter of the float size,
+    and normalized there in one vectorized operation.
+    """
+
+    def __init__(self, mean, std, device):
+        self.device = device
+        self.mean = torch.tensor(mean, device=device).view(1, 3, 1, 1) * 255
+        self.std = torch.tensor(std, device=device).view(1, 3, 1, 1) * 255
+
+    def __call__(self, images: np.ndarray) -> torch.Tensor:
+        batch = torch.from_numpy(images).to(self.device).permute(0, 3, 1, 2)
+        return (batch.float() - self.mean) / self.std
@@ -1,39 +1,166 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
 import torch
-from fastapi import UploadFile
+import torch.nn.functional as F
+from backends import BACKENDS, FeaturesAndLogits, load_backend
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
 from litserve import LitAPI, LitServer
 from PIL import Image
+from preprocessing import Normalize, load_image
 from torchvision.models import ResNet50_Weights, resnet50
 
 
 class ImageRecognitionAPI(LitAPI):
+    """ResNet-50 image classification.
+
+    The uploads of a batch are decoded in parallel on a thread pool, and are
+    normalized together once the batch is stacked. An invalid request, such as
+    an upload that is not an image, gets its own 400 without failing the rest
+    of its batch.
+
+    Requests can ask for the ``top_k`` classes and for the L2-normalized
+    penultimate-layer ``embedding``, both taken from the same forward pass.
+    Only the top-k scores leave the device.
+
+    ``backend`` selects eager PyTorch (``"torch"``), a frozen TorchScript trace
+    (``"torchscript"``), or ONNX Runtime on CPU (``"onnx"``, or ``"onnx-int8"``
+    with dynamically quantized weights). ONNX models are exported once to
+    ``cache_dir``.
+    """
+
+    def __init__(
+        self,
+        decode_workers: int = 4,
+        backend: str = "torch",
+        cache_dir: str = "models",
+        intra_op_threads: int = 0,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend {backend!r}, expected one of {BACKENDS}")
+        self.decode_workers = decode_workers
+        self.backend = backend
+        self.cache_dir = cache_dir
+        self.intra_op_threads = intra_op_threads
+
     def setup(self, device):
         self.device = device
         self.weights = ResNet50_Weights.IMAGENET1K_V2
-        self.preprocess = self.weights.transforms()
+        preset = self.weights.transforms()
+        self.resize_size = preset.resize_size[0]
+        self.crop_size = preset.crop_size[0]
+        self.normalize = Normalize(preset.mean, preset.std, device)
         self.categories = self.weights.meta["categories"]
-        self.model = resnet50(weights=self.weights)
-        self.model.to(self.device)
-        self.model.eval()
+        model = resnet50(weights=self.weights)
+        # The backbone returns pooled features; the classifier runs separately
+        classifier, model.fc = model.fc, torch.nn.Identity()
+        self.model = load_backend(
+            self.backend,
+            FeaturesAndLogits(model, classifier),
+            device,
+            self.cache_dir,
+            # The weights file name includes its hash, so new weights re-export
+            cache_key=Path(self.weights.url).stem,
+            intra_op_threads=self.intra_op_threads,
+        )
+        self.pool = ThreadPoolExecutor(max_workers=self.decode_workers)
+
+    def decode_request(self, request):
+        # Errors are returned rather than raised: LitServe decodes a whole
+        # batch in one step, so raising would fail every request in it
+        try:
+            top_k = int(request.get("top_k", 1))
+        except ValueError:
+            top_k = 0
+        if not 1 <= top_k <= len(self.categories):
+            return HTTPException(
+                status_code=400,
+                detail=f"top_k must be an integer between 1 and {len(self.categories)}",
+            )
+        embedding = str(request.get("embedding", "false")).lower() in ("1", "true")
+
+        upload = request.get("request")
+        if not hasattr(upload, "file"):
+            return HTTPException(status_code=400, detail="Missing image file 'request'")
+        # PIL releases the GIL while decoding and resizing
+        image = self.pool.submit(
+            load_image, upload.file.read(), self.resize_size, self.crop_size
+        )
+        return image, top_k, embedding
+
+    def batch(self, inputs):
+        """Wait for the decoded images and normalize them as one batch.
+
+        Returns the stacked images, top-k and embedding flags of the valid
+        requests, and one error (or None) per request.
+        """
+        errors = [item if isinstance(item, HTTPException) else None for item in inputs]
+        images, top_ks, embeddings = [], [], []
+        for i, item in enumerate(inputs):
+            if errors[i] is not None:
+                continue
+            future, top_k, embedding = item
+            try:
+                images.append(future.result())
+            except (OSError, ValueError, Image.DecompressionBombError):
+                errors[i] = HTTPException(
+                    status_code=400, detail="Upload is not a readable image"
+                )
+                continue
+            top_ks.append(top_k)
+            embeddings.append(embedding)
+        images = self.normalize(np.stack(images)) if images else None
+        return images, top_ks, embeddings, errors
+
+    def predict(self, x):
+        batched = self.max_batch_size > 1
+        images, top_ks, embeddings, errors = x if batched else self.batch([x])
+        outputs = list(errors)
+        if images is None:
+            return outputs if batched else outputs[0]
+
+        features, logits = self.model(images)
+        with torch.inference_mode():
+            probabilities = logits.softmax(dim=1)
+            scores, indices = probabilities.topk(max(top_ks), dim=1)
+            scores, indices = scores.cpu(), indices.cpu()
+            if any(embeddings):
+                features = F.normalize(features, dim=1).cpu()
 
-    def decode_request(self, request: UploadFile):
-        with Image.open(request.file) as img:
-            image = img.convert("RGB")
-        batch = self.preprocess(image).unsqueeze(0).to(self.device)
-        return batch
+        valid = [i for i, error in enumerate(errors) if error is None]
+        for i, (top_k, embedding) in enumerate(zip(top_ks, embeddings)):
+            output = {
+                "indices": indices[i, :top_k].tolist(),
+                "scores": scores[i, :top_k].tolist(),
+            }
+            if embedding:
+                output["embedding"] = features[i].tolist()
+            outputs[valid[i]] = output
+        return outputs if batched else outputs[0]
 
-    def predict(self, batch):
-        with torch.no_grad():
-            prediction = self.model(batch).squeeze(0).softmax(0)
-        return prediction
+    def unbatch(self, output):
+        return output
 
-    def encode_response(self, prediction):
-        class_idx = prediction.argmax().item()
-        class_name = self.categories[class_idx]
-        confidence = round(prediction[class_idx].item(), 5)
-        return {"class": class_name, "confidence": confidence}
+    def encode_response(self, output):
+        if isinstance(output, HTTPException):
+            return JSONResponse(
+                status_code=output.status_code, content={"detail": output.detail}
+            )
+        predictions = [
+            {"class": self.categories[class_idx], "confidence": round(score, 5)}
+            for class_idx, score in zip(output["indices"], output["scores"])
+        ]
+        response = {**predictions[0], "predictions": predictions}
+        if "embedding" in output:
+            response["embedding"] = output["embedding"]
+        return response
 
 
 if __name__ == "__main__":
-    api = ImageRecognitionAPI()
+    api = ImageRecognitionAPI(max_batch_size=16, batch_timeout=0.01)
     server = LitServer(api)
     server.run(port=8000)
@@ -0,0 +1,48 @@
+"""Latency and throughput of the execution backends on CPU.
+
+Times the model alone (preprocessing excluded) for every backend: median
+latency of a single image, and images/s at batch size 16. Run from the
+image-recognition-api folder:
+
+    python tests/backend_benchmark.py
+"""
+
+import os
+import statistics
+import sys
+import time
+
+import torch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backends import BACKENDS
+from server import ImageRecognitionAPI
+
+
+def time_model(model, batch_size: int, runs: int) -> list:
+    images = torch.randn(batch_size, 3, 224, 224)
+    model(images)  # warm up
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        model(images)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main(batch_size: int = 16, runs: int = 10):
+    print(f"torch threads: {torch.get_num_threads()}, CPUs: {os.cpu_count()}")
+    print(f"{'backend':<12} {'latency (ms)':>14} {'images/s @' + str(batch_size):>16}")
+    for backend in BACKENDS:
+        api = ImageRecognitionAPI(backend=backend)
+        api.setup("cpu")
+        latency = statistics.median(time_model(api.model, 1, runs)) * 1000
+        throughput = batch_size / statistics.median(
+            time_model(api.model, batch_size, runs)
+        )
+        print(f"{backend:<12} {latency:>14.1f} {throughput:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""CPU throughput of the image-recognition pipeline at batch sizes 1-32.
+
+Runs decode_request, batch and predict in process, the way a LitServe worker
+does, and compares decoding with the torchvision preset against the draft-mode
+decoder. Uses cat.jpg and a 12 MP upscale of it to stand in for phone photos.
+Run from the image-recognition-api folder:
+
+    python tests/benchmark.py
+"""
+
+import io
+import os
+import sys
+import time
+
+import torch
+from fastapi import UploadFile
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from preprocessing import load_image
+from server import ImageRecognitionAPI
+
+SAMPLE_FILE = os.path.join(os.path.dirname(__file__), "..", "cat.jpg")
+
+
+def make_images() -> dict:
+    with open(SAMPLE_FILE, "rb") as f:
+        small = f.read()
+    buffer = io.BytesIO()
+    Image.open(io.BytesIO(small)).resize((4032, 3024)).save(buffer, "JPEG")
+    return {"600x400": small, "4032x3024": buffer.getvalue()}
+
+
+def images_per_second(fn, data: bytes, num_images: int = 32) -> float:
+    start = time.perf_counter()
+    for _ in range(num_images):
+        fn(data)
+    return num_images / (time.perf_counter() - start)
+
+
+def benchmark_decode(api: ImageRecognitionAPI, images: dict):
+    preset = api.weights.transforms()
+
+    def torchvision_preset(data):
+        with Image.open(io.BytesIO(data)) as img:
+            return preset(img.convert("RGB"))
+
+    def draft_decode(data):
+        return load_image(data, api.resize_size, api.crop_size)
+
+    print("Decode (single thread, images/s)")
+    for name, data in images.items():
+        baseline = images_per_second(torchvision_preset, data)
+        draft = images_per_second(draft_decode, data)
+        print(f"  {name:>10}: preset {baseline:7.1f}  draft {draft:7.1f}")
+
+
+def benchmark_pipeline(images: dict, batch_sizes=(1, 2, 4, 8, 16, 32)):
+    print("Pipeline (decode + batch + predict, images/s)")
+    for batch_size in batch_sizes:
+        api = ImageRecognitionAPI(max_batch_size=batch_size)
+        api.setup("cpu")
+        results = []
+        for name, data in images.items():
+            num_batches = max(64 // batch_size, 2)
+
+            def run_batch():
+                inputs = [
+                    api.decode_request({"request": UploadFile(io.BytesIO(data))})
+                    for _ in range(batch_size)
+                ]
+                if batch_size == 1:
+                    return api.predict(inputs[0])
+                return api.unbatch(api.predict(api.batch(inputs)))
+
+            run_batch()  # warm up
+            start = time.perf_counter()
+            for _ in range(num_batches):
+                run_batch()
+            elapsed = time.perf_counter() - start
+            results.append(f"{name} {num_batches * batch_size / elapsed:7.1f}")
+        print(f"  batch {batch_size:>2}: " + "  ".join(results))
+
+
+if __name__ == "__main__":
+    print(f"torch threads: {torch.get_num_threads()}")
+    images = make_images()
+    api = ImageRecognitionAPI()
+    api.setup("cpu")
+    benchmark_decode(api, images)
+    benchmark_pipeline(images)
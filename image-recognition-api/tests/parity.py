@@ -0,0 +1,85 @@
+"""Check that every backend matches eager PyTorch on the sample images.
+
+Reports the largest logit difference, top-1 agreement and top-5 overlap of
+each backend against the eager model, and exits with status 1 if a backend
+is outside its tolerance. Exact backends must match the logits to
+``tolerance``; the int8 backend must keep every top-1 class, most of the
+top-5 and the features' direction. Run from the image-recognition-api
+folder:
+
+    python tests/parity.py
+"""
+
+import io
+import os
+import sys
+
+import torch
+from fastapi import UploadFile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backends import BACKENDS
+from server import ImageRecognitionAPI
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_FILES = [os.path.join(ROOT, name) for name in ("cat.jpg", "aeroplane.jpg")]
+
+
+def load_batch(api: ImageRecognitionAPI) -> torch.Tensor:
+    inputs = []
+    for path in SAMPLE_FILES:
+        with open(path, "rb") as f:
+            inputs.append(
+                api.decode_request({"request": UploadFile(io.BytesIO(f.read()))})
+            )
+    images = api.batch(inputs)[0]
+    return images
+
+
+def outputs(backend: str, images: torch.Tensor):
+    api = ImageRecognitionAPI(backend=backend)
+    api.setup("cpu")
+    features, logits = api.model(images)
+    return features.float(), logits.float()
+
+
+def main(
+    tolerance: float = 1e-3,
+    min_int8_overlap: float = 0.8,
+    min_int8_cosine: float = 0.99,
+) -> bool:
+    reference = ImageRecognitionAPI()
+    reference.setup("cpu")
+    images = load_batch(reference)
+    ref_features, ref_logits = outputs("torch", images)
+    ref_top5 = ref_logits.topk(5, dim=1).indices
+
+    passed = True
+    for backend in BACKENDS[1:]:
+        features, logits = outputs(backend, images)
+        top5 = logits.topk(5, dim=1).indices
+        max_diff = (logits - ref_logits).abs().max().item()
+        top1 = (top5[:, 0] == ref_top5[:, 0]).float().mean().item()
+        overlap = (
+            sum(len(set(a.tolist()) & set(b.tolist())) for a, b in zip(top5, ref_top5))
+            / ref_top5.numel()
+        )
+        cosine = (
+            torch.nn.functional.cosine_similarity(features, ref_features).min().item()
+        )
+        if backend == "onnx-int8":
+            ok = top1 == 1 and overlap >= min_int8_overlap and cosine >= min_int8_cosine
+        else:
+            ok = max_diff <= tolerance and top1 == 1
+        passed &= ok
+        print(
+            f"{backend:<12} max |logit diff| {max_diff:.2e}  top-1 agreement {top1:.0%}"
+            f"  top-5 overlap {overlap:.0%}  min feature cosine {cosine:.4f}"
+            f"  {'ok' if ok else 'FAILED'}"
+        )
+    return passed
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,94 @@
+"""Concurrent, pooled image fetching with an LRU cache of decoded images."""
+
+import io
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import requests
+from fastapi import HTTPException
+from PIL import Image
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class ImageFetcher:
+    """Download and decode image URLs in parallel over a pooled HTTP session.
+
+    Args:
+        max_workers: Number of concurrent downloads (and pooled connections).
+        timeout: ``(connect, read)`` timeout in seconds per request.
+        max_bytes: Largest image body accepted, checked while streaming.
+        retries: Retries for connection errors and 429/5xx responses.
+        cache_size: Number of decoded images kept in the LRU cache.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 16,
+        timeout: tuple = (3.05, 10),
+        max_bytes: int = 20 * 1024 * 1024,
+        retries: int = 2,
+        cache_size: int = 256,
+    ):
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, Image.Image]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=0.2,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=("GET",),
+        )
+        adapter = HTTPAdapter(
+            pool_connections=max_workers, pool_maxsize=max_workers, max_retries=retry
+        )
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _download(self, url: str) -> bytes:
+        with self.session.get(url, timeout=self.timeout, stream=True) as response:
+            response.raise_for_status()
+            if int(response.headers.get("Content-Length", 0)) > self.max_bytes:
+                raise ValueError(f"image exceeds {self.max_bytes} bytes")
+            buffer = io.BytesIO()
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                buffer.write(chunk)
+                if buffer.tell() > self.max_bytes:
+                    raise ValueError(f"image exceeds {self.max_bytes} bytes")
+        return buffer.getvalue()
+
+    def fetch(self, url: str) -> Image.Image:
+        """Return the decoded RGB image for ``url``, from the cache if
+        possible."""
+        with self._lock:
+            if url in self._cache:
+                self._cache.move_to_end(url)
+                return self._cache[url]
+
+        try:
+            with Image.open(io.BytesIO(self._download(url))) as img:
+                image = img.convert("RGB")
+        except (requests.RequestException, OSError, ValueError) as e:
+            raise HTTPException(
+                status_code=400, detail=f"Failed to fetch image {url}: {e}"
+            ) from e
+
+        with self._lock:
+            self._cache[url] = image
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return image
+
+    def fetch_all(self, urls: List[str]) -> List[Image.Image]:
+        """Fetch and decode all ``urls`` concurrently, preserving their
+        order."""
+        if not urls:
+            return []
+        return list(self._executor.map(self.fetch, urls))
@@ -1,6 +1,6 @@
 from typing import List, Literal, Union
 
-from pydantic import BaseModel, HttpUrl
+from pydantic import BaseModel, Field, HttpUrl
 
 
 class TextInput(BaseModel):
@@ -14,14 +14,20 @@ class ImageInput(BaseModel):
 class EmbeddingRequest(BaseModel):
     input: Union[str, List[Union[str, TextInput, ImageInput]]]
     model: Literal["jina-clip-v2"]
-    encoding_format: Literal["float"] = "float"
-    dimensions: int = 512
+    # "base64" follows the OpenAI API; "float32" and "float16" opt in to a raw
+    # application/octet-stream body holding the row-major embedding matrix.
+    # "int8" and "binary" return quantized integer lists.
+    encoding_format: Literal[
+        "float", "base64", "float32", "float16", "int8", "binary"
+    ] = "float"
+    # Matryoshka dimensions, from 64 up to the model's full 1024
+    dimensions: int = Field(512, ge=64, le=1024)
     normalized: bool = True
 
 
 # Model to represent a single embedding
 class Embedding(BaseModel):
-    embedding: List[float]
+    embedding: Union[List[float], List[int], str]
     index: int
     object: Literal["embedding"] = "embedding"
 
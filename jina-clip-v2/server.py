@@ -1,82 +1,155 @@
 # server.py
-from typing import List, Tuple
+from typing import List, Tuple, Union
 
 import litserve as ls
-from model import Embedding, EmbeddingRequest, EmbeddingResponse, Usage
+import numpy as np
+from encoding import (
+    QUANTIZED_FORMATS,
+    RAW_DTYPES,
+    encode_base64,
+    encode_raw,
+    quantize_embeddings,
+)
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from images import ImageFetcher
+from model import EmbeddingRequest, Usage
+from PIL import Image
 from sentence_transformers import SentenceTransformer
-from utils import parse_inputs
+from utils import parse_inputs, truncate_embeddings
 
 
 class EmbeddingAPI(ls.LitAPI):
     def setup(self, device):
         """Setup the model."""
-        self.truncate_dim = 512
+        # Load the full 1024 dims; each request truncates to its `dimensions`
         self.model = SentenceTransformer(
             "jinaai/jina-clip-v2",
             trust_remote_code=True,
-            truncate_dim=self.truncate_dim,
         )
+        self.image_fetcher = ImageFetcher()
 
     def decode_request(
         self, request: EmbeddingRequest, context: dict
-    ) -> Tuple[List[str], List[str], List[str]]:
+    ) -> Union[Tuple[List[str], List[Image.Image], List[str]], HTTPException]:
         """Decode the incoming request and prepare it for prediction."""
         # Update the context with request metadata
         context.update(
             {
                 "model": request.model,
                 "normalized": request.normalized,
+                "dimensions": request.dimensions,
+                "encoding_format": request.encoding_format,
             }
         )
         # Parse the inputs into text and image lists
-        return parse_inputs(request.input)
+        sentences, image_urls, input_types = parse_inputs(request.input)
+
+        # Download and decode all images concurrently, so the model never
+        # waits on the network inside predict. A failed download is returned
+        # rather than raised, so it fails only this request and not its batch
+        try:
+            images = self.image_fetcher.fetch_all(image_urls)
+        except HTTPException as e:
+            return e
+        return sentences, images, input_types
 
     def predict(
-        self, inputs: Tuple[List[str], List[str], List[str]], context: dict
-    ) -> List[List[float]]:
-        """Generate embeddings for text and image inputs, preserving the input
-        order."""
+        self,
+        batch: List[
+            Union[Tuple[List[str], List[Image.Image], List[str]], HTTPException]
+        ],
+        context: List[dict],
+    ) -> List[Union[np.ndarray, HTTPException]]:
+        """Generate embeddings for a batch of requests, preserving each
+        request's input order.
 
-        sentences, image_urls, input_types = inputs
-        text_embeddings, image_embeddings = [], []
+        Texts and images from all requests are encoded in one call per
+        modality, and a modality with no inputs is skipped entirely. Requests
+        that failed in decode_request keep their error.
+        """
+        outputs = list(batch)
+        valid = [
+            i for i, item in enumerate(batch) if not isinstance(item, HTTPException)
+        ]
+        batch = [batch[i] for i in valid]
+        context = [context[i] for i in valid]
 
-        # Encode text and images
-        text_embeddings = self.model.encode(
-            sentences, normalize_embeddings=context["normalized"]
+        sentences = [text for texts, _, _ in batch for text in texts]
+        images = [image for _, request_images, _ in batch for image in request_images]
+        is_text = np.array(
+            [t == "text" for _, _, input_types in batch for t in input_types],
+            dtype=bool,
         )
-        if image_urls:
-            image_embeddings = self.model.encode(
-                image_urls, normalize_embeddings=context["normalized"]
+
+        # Encode text and images; normalization happens after truncation
+        text_embeddings = self.model.encode(sentences) if sentences else None
+        image_embeddings = self.model.encode(images) if images else None
+
+        # Scatter both modalities back into input order with a boolean mask
+        if text_embeddings is not None:
+            dimensions = text_embeddings.shape[1]
+        elif image_embeddings is not None:
+            dimensions = image_embeddings.shape[1]
+        else:
+            # No request has any input; each gets an empty (0, dimensions) result
+            dimensions = max((ctx["dimensions"] for ctx in context), default=0)
+        embeddings = np.empty((len(is_text), dimensions), dtype=np.float32)
+        if text_embeddings is not None:
+            embeddings[is_text] = text_embeddings
+        if image_embeddings is not None:
+            embeddings[~is_text] = image_embeddings
+
+        # Split back into per-request outputs with each request's options
+        sizes = [len(input_types) for _, _, input_types in batch]
+        splits = np.split(embeddings, np.cumsum(sizes)[:-1]) if batch else []
+        for i, output, ctx in zip(valid, splits, context):
+            outputs[i] = truncate_embeddings(
+                output, ctx["dimensions"], ctx["normalized"]
             )
+        return outputs
 
-        # Create an iterator for embeddings to preserve input order
-        text_iterator = iter(text_embeddings)
-        image_iterator = iter(image_embeddings)
+    def encode_response(self, output: Union[np.ndarray, HTTPException], context: dict):
+        """Encode the embedding output into the response.
 
-        # Combine embeddings based on input types
-        combined_embeddings = [
-            next(text_iterator) if input_type == "text" else next(image_iterator)
-            for input_type in input_types
-        ]
-        return combined_embeddings
-
-    def encode_response(
-        self, output: List[List[float]], context: dict
-    ) -> EmbeddingResponse:
-        """Encode the embedding output into the response model."""
-        embeddings = [
-            Embedding(embedding=embedding, index=i)
-            for i, embedding in enumerate(output)
-        ]
-        return EmbeddingResponse(
-            data=embeddings,
-            model=context["model"],
-            usage=Usage(),  # TODO: Add usage statistics
-        )
+        The response is built from plain dicts rather than one pydantic
+        ``Embedding`` per vector, and the binary formats are serialized
+        straight from the array buffer.
+        """
+        if isinstance(output, HTTPException):
+            return JSONResponse(
+                status_code=output.status_code, content={"detail": output.detail}
+            )
+
+        embeddings = np.asarray(output, dtype=np.float32)
+        encoding_format = context["encoding_format"]
+        if encoding_format in RAW_DTYPES:
+            return encode_raw(embeddings, encoding_format)
+
+        if encoding_format == "base64":
+            data = encode_base64(embeddings)
+        elif encoding_format in QUANTIZED_FORMATS:
+            data = quantize_embeddings(embeddings, encoding_format).tolist()
+        else:
+            data = embeddings.tolist()
+
+        return {
+            "data": [
+                {"embedding": embedding, "index": i, "object": "embedding"}
+                for i, embedding in enumerate(data)
+            ],
+            "model": context["model"],
+            "object": "list",
+            "usage": Usage().model_dump(),  # TODO: Add usage statistics
+        }
 
 
 if __name__ == "__main__":
-    api = EmbeddingAPI(api_path="/v1/embeddings")
+    api = EmbeddingAPI(
+        api_path="/v1/embeddings",
+        max_batch_size=16,
+        batch_timeout=0.05,
+    )
     server = ls.LitServer(api, accelerator="auto")
 
     server.run(port=8000)
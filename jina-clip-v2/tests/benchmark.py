@@ -0,0 +1,112 @@
+"""Benchmarking the jina-clip-v2 embeddings API on text-only, image-only and
+mixed workloads.
+
+Start the server with ``python server.py`` and run ``python tests/benchmark.py``.
+Set ``IMAGE_URL`` to an image served close to the server (for example
+``python -m http.server`` in this folder and ``http://localhost:8080/beach1.jpg``)
+so that download time does not dominate the image numbers.
+"""
+
+import concurrent.futures
+import logging
+import os
+import time
+from typing import Tuple
+
+import requests
+from tqdm import tqdm
+
+logging.basicConfig(level=logging.INFO)
+
+SERVER_URL = os.getenv("SERVER_URL", "http://localhost:{}/v1/embeddings")
+IMAGE_URL = os.getenv("IMAGE_URL", "https://i.ibb.co/nQNGqL0/beach1.jpg")
+
+INPUT_TEXT = "A beautiful sunset over the beach"
+
+WORKLOADS = {
+    "text": [INPUT_TEXT] * 4,
+    "image": [IMAGE_URL] * 4,
+    "mixed": [INPUT_TEXT, IMAGE_URL] * 2,
+}
+
+
+def send_embedding_request(port: int, inputs: list) -> Tuple[float, int]:
+    """Send a request to the embeddings API and return the response time and
+    status code."""
+    payload = {"input": inputs, "model": "jina-clip-v2", "encoding_format": "float"}
+    start_time = time.time()
+    try:
+        response = requests.post(SERVER_URL.format(port), json=payload)
+        status_code = response.status_code
+    except requests.RequestException as e:
+        logging.error(f"Request failed: {e}")
+        status_code = 500  # Internal Server Error
+    end_time = time.time()
+    return end_time - start_time, status_code
+
+
+def benchmark(
+    workload: str = "text",
+    num_requests: int = 100,
+    concurrency: int = 32,
+    port: int = 8000,
+) -> dict:
+    """Send ``num_requests`` requests of the given workload and report
+    throughput."""
+    inputs = WORKLOADS[workload]
+    start_time = time.time()
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [
+            executor.submit(send_embedding_request, port, inputs)
+            for _ in range(num_requests)
+        ]
+
+        response_times = []
+        status_codes = []
+
+        for future in tqdm(
+            concurrent.futures.as_completed(futures),
+            total=num_requests,
+            desc=f"Benchmarking {workload}",
+        ):
+            response_time, status_code = future.result()
+            response_times.append(response_time)
+            status_codes.append(status_code)
+
+    total_benchmark_time = time.time() - start_time
+    success_requests = status_codes.count(200)
+
+    metrics = {
+        "Workload": workload,
+        "Total Requests": num_requests,
+        "Concurrency": concurrency,
+        "Total Benchmark Time (s)": total_benchmark_time,
+        "Avg Response Time (ms)": sum(response_times) / num_requests * 1000,
+        "Failed Requests": num_requests - success_requests,
+        "Requests Per Second (RPS)": num_requests / total_benchmark_time,
+        "Inputs Per Second": success_requests * len(inputs) / total_benchmark_time,
+    }
+
+    logging.info("-" * 50)
+    for key, value in metrics.items():
+        logging.info(f"{key}: {value}")
+    logging.info("-" * 50)
+
+    return metrics
+
+
+if __name__ == "__main__":
+    # Warm up the model and the server's image cache
+    benchmark("mixed", num_requests=16)
+
+    results = [benchmark(workload) for workload in WORKLOADS]
+
+    print(f"{'workload':<10}{'req/s':>10}{'inputs/s':>12}{'avg ms':>10}")
+    for metrics in results:
+        print(
+            f"{metrics['Workload']:<10}"
+            f"{metrics['Requests Per Second (RPS)']:>10.1f}"
+            f"{metrics['Inputs Per Second']:>12.1f}"
+            f"{metrics['Avg Response Time (ms)']:>10.1f}"
+        )
@@ -0,0 +1,136 @@
+"""Tests for ImageFetcher against a local HTTP stand-in server.
+
+Run from the jina-clip-v2 folder:
+
+    python -m pytest tests/test_images.py
+"""
+
+import io
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from fastapi import HTTPException
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from images import ImageFetcher
+
+
+def png_bytes(size=(8, 6), color=(255, 0, 0)) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class Handler(BaseHTTPRequestHandler):
+    requests_seen = []
+
+    def do_GET(self):
+        Handler.requests_seen.append(self.path)
+        path, _, query = self.path.partition("?")
+        if path == "/image.png":
+            # A numeric query sets the red channel, to tell images apart
+            red = int(query) if query.isdigit() else 255
+            self.send_body(png_bytes(color=(red, 0, 0)), "image/png")
+        elif path == "/slow.png":
+            time.sleep(1)
+            self.send_body(png_bytes(), "image/png")
+        elif path == "/large.png":
+            self.send_body(b"\0" * 4096, "image/png")
+        elif path == "/large-unsized.png":
+            # No Content-Length, so only the streaming check can catch it
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png")
+            self.end_headers()
+            self.wfile.write(b"\0" * 4096)
+        elif path == "/page.html":
+            self.send_body(b"<html>not an image</html>", "text/html")
+        else:
+            self.send_error(404)
+
+    def send_body(self, body: bytes, content_type: str):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def base_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def fetcher():
+    return ImageFetcher(max_workers=4, timeout=(1, 0.2), max_bytes=1024, retries=0)
+
+
+def test_fetch_decodes_rgb_image(base_url, fetcher):
+    image = fetcher.fetch(f"{base_url}/image.png")
+    assert image.mode == "RGB"
+    assert image.size == (8, 6)
+    assert image.getpixel((0, 0)) == (255, 0, 0)
+
+
+def test_fetch_uses_cache(base_url, fetcher):
+    url = f"{base_url}/image.png?cached"
+    first = fetcher.fetch(url)
+    assert fetcher.fetch(url) is first
+    assert Handler.requests_seen.count("/image.png?cached") == 1
+
+
+def test_fetch_all_keeps_order(base_url, fetcher):
+    urls = [f"{base_url}/image.png?{i}" for i in range(8)]
+    images = fetcher.fetch_all(urls)
+    assert [image.getpixel((0, 0))[0] for image in images] == list(range(8))
+
+
+def test_timeout(base_url, fetcher):
+    with pytest.raises(HTTPException) as error:
+        fetcher.fetch(f"{base_url}/slow.png")
+    assert error.value.status_code == 400
+    assert "slow.png" in error.value.detail
+
+
+@pytest.mark.parametrize("path", ["/large.png", "/large-unsized.png"])
+def test_oversized(base_url, fetcher, path):
+    with pytest.raises(HTTPException) as error:
+        fetcher.fetch(f"{base_url}{path}")
+    assert error.value.status_code == 400
+    assert "exceeds 1024 bytes" in error.value.detail
+
+
+def test_not_an_image(base_url, fetcher):
+    with pytest.raises(HTTPException) as error:
+        fetcher.fetch(f"{base_url}/page.html")
+    assert error.value.status_code == 400
+
+
+def test_not_found(base_url, fetcher):
+    with pytest.raises(HTTPException) as error:
+        fetcher.fetch(f"{base_url}/missing.png")
+    assert error.value.status_code == 400
+    assert "404" in error.value.detail
+
+
+def test_failures_are_not_cached(base_url, fetcher):
+    url = f"{base_url}/page.html?retry"
+    for _ in range(2):
+        with pytest.raises(HTTPException):
+            fetcher.fetch(url)
+    assert Handler.requests_seen.count("/page.html?retry") == 2
@@ -1,5 +1,6 @@
 from typing import List, Tuple, Union
 
+import numpy as np
 from model import ImageInput, TextInput
 
 
@@ -39,3 +40,15 @@ def parse_inputs(
             input_types.append("image")
 
     return texts, images, input_types
+
+
+def truncate_embeddings(
+    embeddings: np.ndarray, dimensions: int, normalize: bool = True
+) -> np.ndarray:
+    """Matryoshka truncation: keep the first ``dimensions`` components and
+    optionally L2-renormalize them."""
+    embeddings = embeddings[:, :dimensions]
+    if normalize:
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        embeddings = embeddings / np.maximum(norms, 1e-12)
+    return embeddings
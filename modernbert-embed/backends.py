@@ -0,0 +1,197 @@
+"""Execution backends for the sentence embedding model.
+
+Every backend embeds a list of texts and returns their normalized float32
+embeddings as a NumPy array, like ``SentenceTransformer.encode``.
+"""
+
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import List
+
+import numpy as np
+import onnxruntime as ort
+import torch
+from onnxruntime.quantization import QuantType, quantize_dynamic
+from sentence_transformers import SentenceTransformer
+
+BACKENDS = ("torch", "bf16", "onnx", "onnx-int8")
+
+
+class TorchBackend:
+    """Eager PyTorch, optionally under bfloat16 autocast.
+
+    Autocast keeps the fp32 weights and runs the matrix multiplications in
+    bfloat16, which is fast on CPUs with AVX512-BF16 or AMX and on recent GPUs.
+    """
+
+    def __init__(self, model: SentenceTransformer, bf16: bool = False):
+        self.model = model
+        self.bf16 = bf16
+
+    def encode(self, sentences: List[str]) -> np.ndarray:
+        with torch.autocast(
+            self.model.device.type, dtype=torch.bfloat16, enabled=self.bf16
+        ):
+            return self.model.encode(sentences)
+
+
+class SentenceEmbedding(torch.nn.Module):
+    """A SentenceTransformer as a module from token ids to its pooled and
+    normalized sentence embeddings, for export."""
+
+    def __init__(self, model: SentenceTransformer):
+        super().__init__()
+        self.model = model
+
+    def forward(
+        self, input_ids: torch.Tensor, attention_mask: torch.Tensor
+    ) -> torch.Tensor:
+        features = {"input_ids": input_ids, "attention_mask": attention_mask}
+        return self.model(features)["sentence_embedding"]
+
+
+class OnnxBackend:
+    """ONNX Runtime on CPU, with an optional dynamic int8 quantized model.
+
+    The model is exported once to ``cache_dir`` under ``name``, and the file
+    is reused by later workers and restarts. Texts are tokenized here and
+    embedded in mini-batches of similar length, as ``encode`` does.
+
+    Args:
+        intra_op_threads: Threads used inside each operator; 0 lets ONNX
+            Runtime use one per physical core. Lower it when several workers
+            share the CPU.
+        batch_size: Texts per ONNX Runtime call.
+    """
+
+    def __init__(
+        self,
+        model: SentenceTransformer,
+        cache_dir: str,
+        name: str,
+        quantize: bool = False,
+        intra_op_threads: int = 0,
+        batch_size: int = 32,
+    ):
+        path = export_onnx(model, Path(cache_dir) / f"{name}.onnx")
+        if quantize:
+            path = quantize_onnx(path, Path(cache_dir) / f"{name}-int8.onnx")
+        # Only the tokenizer is kept, so the PyTorch weights can be freed
+        self.tokenizer = model.tokenizer
+        self.max_seq_length = model.max_seq_length
+        self.batch_size = batch_size
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = intra_op_threads
+        self.session = ort.InferenceSession(
+            str(path), options, providers=["CPUExecutionProvider"]
+        )
+
+    def encode(self, sentences: List[str]) -> np.ndarray:
+        # Longest first, so each mini-batch pads to a similar length
+        order = np.argsort([-len(sentence) for sentence in sentences], kind="stable")
+        embeddings = []
+        for start in range(0, len(order), self.batch_size):
+            tokens = self.tokenizer(
+                [sentences[i] for i in order[start : start + self.batch_size]],
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors="np",
+            )
+            inputs = {
+                "input_ids": tokens["input_ids"].astype(np.int64),
+                "attention_mask": tokens["attention_mask"].astype(np.int64),
+            }
+            embeddings.append(self.session.run(["sentence_embedding"], inputs)[0])
+
+        result = np.empty((len(order), embeddings[0].shape[1]), dtype=np.float32)
+        result[order] = np.concatenate(embeddings)
+        return result
+
+
+def weights_hash(model: torch.nn.Module, length: int = 12) -> str:
+    """Short SHA-256 of the model's parameters and buffers, for the export
+    file name, so that new weights or another model revision are exported
+    again instead of reusing a stale file."""
+    digest = hashlib.sha256()
+    for name, tensor in model.state_dict().items():
+        digest.update(name.encode())
+        digest.update(
+            tensor.detach().cpu().contiguous().view(-1).view(torch.uint8).numpy()
+        )
+    return digest.hexdigest()[:length]
+
+
+def _atomic_path(path: Path) -> Path:
+    """Temporary path next to ``path``, so workers exporting at the same time
+    never read a half-written file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=path.suffix)
+    os.close(fd)
+    os.chmod(tmp_path, 0o644)
+    return Path(tmp_path)
+
+
+def export_onnx(model: SentenceTransformer, path: Path) -> Path:
+    if path.exists():
+        return path
+    tmp_path = _atomic_path(path)
+    # Two texts of different lengths, so the example batch is padded
+    tokens = model.tokenizer(
+        ["search_query: example", "search_document: a longer example text"],
+        padding=True,
+        return_tensors="pt",
+    )
+    axes = {0: "batch", 1: "sequence"}
+    torch.onnx.export(
+        SentenceEmbedding(model).cpu().eval(),
+        (tokens["input_ids"], tokens["attention_mask"]),
+        str(tmp_path),
+        input_names=["input_ids", "attention_mask"],
+        output_names=["sentence_embedding"],
+        dynamic_axes={
+            "input_ids": axes,
+            "attention_mask": axes,
+            "sentence_embedding": {0: "batch"},
+        },
+        opset_version=17,
+        dynamo=False,
+    )
+    os.replace(tmp_path, path)
+    return path
+
+
+def quantize_onnx(path: Path, quantized_path: Path) -> Path:
+    if quantized_path.exists():
+        return quantized_path
+    tmp_path = _atomic_path(quantized_path)
+    quantize_dynamic(path, tmp_path, weight_type=QuantType.QInt8)
+    os.replace(tmp_path, quantized_path)
+    return quantized_path
+
+
+def load_backend(
+    name: str,
+    model: SentenceTransformer,
+    cache_dir: str,
+    cache_key: str,
+    intra_op_threads: int = 0,
+):
+    """Build the backend called ``name`` (one of :data:`BACKENDS`)."""
+    if name == "torch":
+        return TorchBackend(model)
+    if name == "bf16":
+        return TorchBackend(model, bf16=True)
+    if name in ("onnx", "onnx-int8"):
+        return OnnxBackend(
+            model,
+            cache_dir,
+            cache_key,
+            quantize=name == "onnx-int8",
+            intra_op_threads=intra_op_threads,
+        )
+    raise ValueError(f"Unknown backend {name!r}, expected one of {BACKENDS}")
@@ -0,0 +1,49 @@
+"""Base64, raw binary and quantized embedding encodings.
+
+embeddings-api, modernbert-embed and jina-clip-v2 each keep a copy of this
+module so that every example runs on its own; change the copies together.
+"""
+
+import base64
+
+import numpy as np
+from fastapi import Response
+
+RAW_DTYPES = {"float32": np.float32, "float16": np.float16}
+QUANTIZED_FORMATS = ("int8", "binary")
+
+
+def encode_base64(embeddings: np.ndarray) -> list:
+    """Encode each row as base64 of its little-endian float32 bytes, as the
+    OpenAI API does."""
+    embeddings = np.ascontiguousarray(embeddings, dtype="<f4")
+    return [base64.b64encode(row.data).decode("ascii") for row in embeddings]
+
+
+def quantize_embeddings(embeddings: np.ndarray, encoding_format: str) -> np.ndarray:
+    """Quantize embeddings for compact storage.
+
+    ``"int8"`` scales each vector by its largest absolute component, which
+    preserves cosine similarity and does not depend on the rest of the batch.
+    ``"binary"`` keeps the sign bit of each component, packed 8 per uint8.
+    """
+    if encoding_format == "int8":
+        scale = 127 / np.maximum(np.abs(embeddings).max(axis=1, keepdims=True), 1e-12)
+        return np.round(embeddings * scale).astype(np.int8)
+    return np.packbits(embeddings > 0, axis=1)
+
+
+def encode_raw(embeddings: np.ndarray, encoding_format: str) -> Response:
+    """Return the embedding matrix as raw bytes straight from the array
+    buffer."""
+    embeddings = np.ascontiguousarray(
+        embeddings, dtype=np.dtype(RAW_DTYPES[encoding_format]).newbyteorder("<")
+    )
+    return Response(
+        content=embeddings.tobytes(),
+        media_type="application/octet-stream",
+        headers={
+            "X-Embedding-Shape": ",".join(map(str, embeddings.shape)),
+            "X-Embedding-Dtype": encoding_format,
+        },
+    )
@@ -1,24 +1,96 @@
-from litserve import LitAPI, LitServer, OpenAIEmbeddingSpec
-from litserve.specs.openai_embedding import EmbeddingRequest
+import numpy as np
+from backends import BACKENDS, load_backend, weights_hash
+from litserve import LitAPI, LitServer
 from sentence_transformers import SentenceTransformer
+from spec import BinaryEmbeddingSpec, EmbeddingRequest
+
+# The model was trained with a task prefix on every input
+PREFIXES = {"query": "search_query: ", "document": "search_document: "}
 
 
 class ModernBertEmbeddingAPI(LitAPI):
+    """ModernBERT Embed behind the OpenAI embeddings API.
+
+    Each request sets ``input_type`` to ``"query"`` (the default) for search
+    queries or ``"document"`` for text to index, which picks the prefix its
+    inputs get. Concurrent requests, of either type, are embedded together
+    in one ``encode`` call, which sorts all their inputs by length so each
+    mini-batch pads as little as possible.
+
+    ``backend`` selects fp32 PyTorch (``"torch"``), PyTorch under bfloat16
+    autocast (``"bf16"``), or ONNX Runtime on CPU (``"onnx"``, or
+    ``"onnx-int8"`` with dynamically quantized weights). ONNX models are
+    exported once to ``cache_dir``.
+    """
+
+    # Output size of modernbert-embed-base; the spec checks ``dimensions``
+    # against it before a request is batched
+    max_dimensions = 768
+
+    def __init__(
+        self,
+        backend: str = "torch",
+        cache_dir: str = "models",
+        intra_op_threads: int = 0,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend {backend!r}, expected one of {BACKENDS}")
+        self.backend = backend
+        self.cache_dir = cache_dir
+        self.intra_op_threads = intra_op_threads
+
     def setup(self, device):
         self.model_name = "nomic-ai/modernbert-embed-base"
-        self.model = SentenceTransformer(self.model_name)  # 768 dim
-        self.prefix = "search_query: "
+        if self.backend.startswith("onnx"):
+            device = "cpu"
+        model = SentenceTransformer(self.model_name, device=device)  # 768 dim
+        cache_key = self.model_name.replace("/", "--")
+        if self.backend.startswith("onnx"):
+            # The weights hash is in the file name, so new weights re-export
+            cache_key += f"-{weights_hash(model)}"
+        self.model = load_backend(
+            self.backend,
+            model,
+            self.cache_dir,
+            cache_key=cache_key,
+            intra_op_threads=self.intra_op_threads,
+        )
+
+    def decode_request(self, request: EmbeddingRequest, context: dict):
+        context["dimensions"] = request.dimensions
+        prefix = PREFIXES[request.input_type or "query"]
+        return [prefix + doc for doc in request.ensure_list()]
+
+    def batch(self, inputs):
+        # Each request keeps its own list, so unbatch can split the results
+        return inputs
+
+    def predict(self, x):
+        batched = self.max_batch_size > 1
+        requests = x if batched else self.batch([x])
+        documents = [document for documents in requests for document in documents]
+        embeddings = self.model.encode(documents)
+        sizes = np.cumsum([len(documents) for documents in requests])[:-1]
+        outputs = np.split(embeddings, sizes)
+        return outputs if batched else outputs[0]
 
-    def decode_request(self, request: EmbeddingRequest):
-        documents = request.ensure_list()
-        prefixed_documents = [self.prefix + doc for doc in documents]
-        return prefixed_documents
+    def unbatch(self, output):
+        return output
 
-    def predict(self, documents):
-        return list(self.model.encode(documents))
+    def encode_response(self, embeddings, context: dict):
+        # Matryoshka truncation, renormalized so cosine/dot scores stay valid
+        if context["dimensions"] is not None:
+            embeddings = embeddings[:, : context["dimensions"]]
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.maximum(norms, 1e-12)
+        return super().encode_response(embeddings)
 
 
 if __name__ == "__main__":
-    api = ModernBertEmbeddingAPI(spec=OpenAIEmbeddingSpec())
+    api = ModernBertEmbeddingAPI(
+        spec=BinaryEmbeddingSpec(), max_batch_size=32, batch_timeout=0.01
+    )
     server = LitServer(api)
     server.run(port=8000)
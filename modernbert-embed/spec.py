@@ -0,0 +1,130 @@
+"""OpenAI embedding spec with base64, raw binary and quantized response
+encodings.
+
+embeddings-api keeps a copy of this module; change both together.
+"""
+
+import asyncio
+import time
+import uuid
+from typing import Literal, Optional
+
+import numpy as np
+from encoding import (
+    QUANTIZED_FORMATS,
+    RAW_DTYPES,
+    encode_base64,
+    encode_raw,
+    quantize_embeddings,
+)
+from fastapi import HTTPException
+from litserve import OpenAIEmbeddingSpec
+from litserve.callbacks.base import EventTypes
+from litserve.specs import openai_embedding
+from litserve.utils import LitAPIStatus, ResponseBufferItem
+
+
+class EmbeddingRequest(openai_embedding.EmbeddingRequest):
+    # "base64" follows the OpenAI API; "float32" and "float16" opt in to a raw
+    # application/octet-stream body holding the row-major embedding matrix.
+    # "int8" and "binary" return quantized integer lists.
+    encoding_format: Literal[
+        "float", "base64", "float32", "float16", "int8", "binary"
+    ] = "float"
+    # Whether the inputs are search queries or documents to index, for models
+    # trained with a prefix per role; None uses the model's default
+    input_type: Optional[Literal["query", "document"]] = None
+
+
+class BinaryEmbeddingSpec(OpenAIEmbeddingSpec):
+    """OpenAIEmbeddingSpec that can skip building Python float lists.
+
+    ``encoding_format="float"`` returns the same response as the parent spec.
+    For the other formats the worker's NumPy output is serialized directly
+    from the array buffer, either as base64 strings in the usual JSON response
+    or as a raw ``application/octet-stream`` body. ``"int8"`` and ``"binary"``
+    return quantized integer lists.
+
+    Unlike the parent spec, requests with several inputs are accepted when
+    the server batches, so a batching LitAPI must keep each request's inputs
+    together in ``batch`` and ``unbatch``. ``dimensions`` is checked against
+    the LitAPI's ``max_dimensions``, if it has one, before the request is
+    queued, so an invalid request never fails the batch it would have joined.
+    """
+
+    def pre_setup(self, lit_api):
+        super().pre_setup(lit_api)
+        self.max_dimensions = getattr(lit_api, "max_dimensions", None)
+
+    async def _get_embeddings(self, request: EmbeddingRequest) -> dict:
+        """Send the request to the inference workers and wait for the
+        result."""
+        uid = uuid.uuid4()
+        event = asyncio.Event()
+        self.response_buffer[uid] = ResponseBufferItem(event=event)
+
+        self._server._callback_runner.trigger_event(
+            EventTypes.ON_REQUEST.value,
+            active_requests=self._server.active_requests,
+            litserver=self._server,
+        )
+
+        self.request_queue.put_nowait(
+            (self.response_queue_id, uid, time.monotonic(), request.model_copy())
+        )
+        await event.wait()
+
+        response, status = self.response_buffer.pop(uid).response
+        if status == LitAPIStatus.ERROR and isinstance(response, HTTPException):
+            raise response
+        if status == LitAPIStatus.ERROR:
+            raise HTTPException(status_code=500)
+
+        self._validate_response(response)
+        return response
+
+    async def embeddings_endpoint(self, request: EmbeddingRequest):
+        if request.dimensions is not None and self.max_dimensions is not None:
+            if not 0 < request.dimensions <= self.max_dimensions:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"dimensions must be between 1 and {self.max_dimensions}",
+                )
+
+        num_items = request.get_num_items()
+        response = await self._get_embeddings(request)
+        if request.encoding_format == "float":
+            data = self._handle_embedding_response(response["embeddings"], num_items)
+            usage = openai_embedding.UsageInfo(**response)
+            return openai_embedding.EmbeddingResponse(
+                data=data, model=request.model, usage=usage
+            )
+
+        embeddings = np.asarray(response["embeddings"], dtype=np.float32)
+        embeddings = embeddings.reshape(len(embeddings), -1)
+        if len(embeddings) != num_items:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Expected {num_items} embeddings, but got {len(embeddings)}.",
+            )
+
+        if request.encoding_format in RAW_DTYPES:
+            return encode_raw(embeddings, request.encoding_format)
+
+        if request.encoding_format in QUANTIZED_FORMATS:
+            data = quantize_embeddings(embeddings, request.encoding_format).tolist()
+        else:
+            data = encode_base64(embeddings)
+
+        return {
+            "data": [
+                {"index": i, "embedding": embedding, "object": "embedding"}
+                for i, embedding in enumerate(data)
+            ],
+            "model": request.model,
+            "object": "list",
+            "usage": {
+                "prompt_tokens": response.get("prompt_tokens", 0),
+                "total_tokens": response.get("total_tokens", 0),
+            },
+        }
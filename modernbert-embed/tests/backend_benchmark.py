@@ -0,0 +1,64 @@
+"""Startup time, latency and throughput of the execution backends on CPU.
+
+Times the model alone for every backend: setup (model load plus ONNX
+export, then again with the cached export), median latency of one query,
+and documents/s for batches of 32 ~100-word documents. Run from the
+modernbert-embed folder:
+
+    python tests/backend_benchmark.py
+"""
+
+import os
+import statistics
+import sys
+import time
+
+import torch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backends import BACKENDS
+from server import PREFIXES, ModernBertEmbeddingAPI
+
+QUERY = PREFIXES["query"] + "how do I serve an embedding model on CPU?"
+DOCUMENT = PREFIXES["document"] + " ".join(
+    ["ModernBERT Embed turns text into vectors for search and clustering."] * 10
+)
+
+
+def setup_seconds(backend: str) -> tuple:
+    start = time.perf_counter()
+    api = ModernBertEmbeddingAPI(backend=backend)
+    api.setup("cpu")
+    return api, time.perf_counter() - start
+
+
+def time_model(model, texts: list, runs: int) -> float:
+    model.encode(texts)  # warm up
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        model.encode(texts)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main(batch_size: int = 32, runs: int = 5):
+    print(f"torch threads: {torch.get_num_threads()}, CPUs: {os.cpu_count()}")
+    print(
+        f"{'backend':<10} {'setup (s)':>10} {'cached (s)':>11} "
+        f"{'latency (ms)':>13} {'docs/s @' + str(batch_size):>11}"
+    )
+    for backend in BACKENDS:
+        _, first_setup = setup_seconds(backend)
+        api, cached_setup = setup_seconds(backend)
+        latency = time_model(api.model, [QUERY], runs) * 1000
+        throughput = batch_size / time_model(api.model, [DOCUMENT] * batch_size, runs)
+        print(
+            f"{backend:<10} {first_setup:>10.1f} {cached_setup:>11.1f} "
+            f"{latency:>13.1f} {throughput:>11.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Load test for /v1/embeddings at increasing concurrency.
+
+Half of the requests are single search queries and half are indexing
+requests with several documents, the mix a search service sees while it is
+being indexed. Reports requests and inputs per second and p50/p95 latency
+for each concurrency level. Start the server with ``max_batch_size=1`` and
+again with the default batching to compare. Run from the modernbert-embed
+folder:
+
+    python tests/benchmark.py
+"""
+
+import concurrent.futures
+import os
+import time
+
+import requests
+
+SERVER_URL = os.getenv("SERVER_URL", "http://127.0.0.1:8000/v1/embeddings")
+QUERIES = [
+    "What is TSNE?",
+    "Who is Laurens van der Maaten?",
+    "how do transformers handle long documents",
+    "fastest way to serve an embedding model",
+]
+DOCUMENT = (
+    "ModernBERT Embed is an embedding model trained from ModernBERT-base, "
+    "bringing the new advances of ModernBERT to embeddings. It supports "
+    "Matryoshka representation learning, so its 768-dimensional embeddings "
+    "can be truncated to 256 dimensions with little loss in quality."
+)
+DOCUMENTS_PER_REQUEST = 8
+
+
+def send_request(i: int):
+    if i % 2:
+        payload = {
+            "input": [DOCUMENT] * DOCUMENTS_PER_REQUEST,
+            "input_type": "document",
+        }
+    else:
+        payload = {"input": QUERIES[i // 2 % len(QUERIES)], "input_type": "query"}
+    payload["model"] = "nomic-ai/modernbert-embed-base"
+    num_inputs = len(payload["input"]) if isinstance(payload["input"], list) else 1
+
+    start_time = time.time()
+    try:
+        status_code = requests.post(SERVER_URL, json=payload).status_code
+    except requests.RequestException:
+        status_code = 500
+    return time.time() - start_time, status_code, num_inputs
+
+
+def load_test(concurrency: int, requests_per_worker: int = 8) -> dict:
+    num_requests = concurrency * requests_per_worker
+    start_time = time.time()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(send_request, range(num_requests)))
+    total_time = time.time() - start_time
+
+    latencies = sorted(latency for latency, _, _ in results)
+    return {
+        "Concurrency": concurrency,
+        "Requests": num_requests,
+        "Failed": sum(status != 200 for _, status, _ in results),
+        "Req/s": num_requests / total_time,
+        "Inputs/s": sum(num_inputs for _, _, num_inputs in results) / total_time,
+        "P50 (s)": latencies[len(latencies) // 2],
+        "P95 (s)": latencies[int(len(latencies) * 0.95)],
+    }
+
+
+if __name__ == "__main__":
+    load_test(concurrency=2, requests_per_worker=2)  # warm up
+    header = None
+    for concurrency in (1, 2, 4, 8, 16, 32):
+        result = load_test(concurrency)
+        if header is None:
+            header = "".join(f"{key:>12}" for key in result)
+            print(header)
+        print(
+            "".join(
+                f"{value:>12.2f}" if isinstance(value, float) else f"{value:>12}"
+                for value in result.values()
+            )
+        )
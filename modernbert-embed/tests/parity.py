@@ -0,0 +1,84 @@
+"""Check that every backend matches fp32 PyTorch on sample queries and
+documents.
+
+Reports the lowest and mean cosine similarity between each backend's
+embeddings and the fp32 embeddings, and how often every query retrieves the
+same top document. Exits with status 1 if a backend's lowest cosine
+similarity is below ``min_cosine``. Run from the modernbert-embed folder:
+
+    python tests/parity.py
+"""
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backends import BACKENDS
+from server import PREFIXES, ModernBertEmbeddingAPI
+
+QUERIES = [
+    "What is TSNE?",
+    "Who is Laurens van der Maaten?",
+    "how to make embeddings smaller",
+    "best way to serve a model on CPU",
+    "what does the attention mask do",
+]
+DOCUMENTS = [
+    (
+        "t-SNE is a statistical method for visualizing high-dimensional data by "
+        "giving each datapoint a location in a two or three-dimensional map."
+    ),
+    (
+        "Laurens van der Maaten is a researcher who developed t-SNE together "
+        "with Geoffrey Hinton."
+    ),
+    (
+        "Matryoshka embeddings can be truncated to fewer dimensions, and int8 or "
+        "binary quantization shrinks each component further."
+    ),
+    (
+        "ONNX Runtime with dynamically quantized int8 weights often runs "
+        "transformer encoders several times faster than fp32 PyTorch on CPUs."
+    ),
+    (
+        "The attention mask marks which tokens are real and which are padding, "
+        "so padded positions are ignored by attention and by mean pooling."
+    ),
+    "LitServe batches concurrent requests into a single forward pass. " * 8,
+]
+
+
+def embed(backend: str, texts: list) -> np.ndarray:
+    api = ModernBertEmbeddingAPI(backend=backend)
+    api.setup("cpu")
+    return api.model.encode(texts)
+
+
+def main(min_cosine: float = 0.99) -> bool:
+    texts = [PREFIXES["query"] + query for query in QUERIES]
+    texts += [PREFIXES["document"] + document for document in DOCUMENTS]
+    reference = embed("torch", texts)
+    ref_top1 = (reference[: len(QUERIES)] @ reference[len(QUERIES) :].T).argmax(1)
+
+    passed = True
+    for backend in BACKENDS[1:]:
+        embeddings = embed(backend, texts)
+        cosine = (embeddings * reference).sum(axis=1) / (
+            np.linalg.norm(embeddings, axis=1) * np.linalg.norm(reference, axis=1)
+        )
+        top1 = (embeddings[: len(QUERIES)] @ embeddings[len(QUERIES) :].T).argmax(1)
+        ok = bool(cosine.min() >= min_cosine)
+        passed &= ok
+        agreement = (top1 == ref_top1).mean()
+        status = "ok" if ok else "FAILED"
+        print(
+            f"{backend:<10} min cosine {cosine.min():.5f}  mean cosine {cosine.mean():.5f}  top-1 retrieval agreement {agreement:.0%}  {status}"
+        )
+    return passed
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
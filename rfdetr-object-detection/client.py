@@ -1,4 +1,5 @@
 import argparse
+import json
 import logging
 import os
 
@@ -12,44 +13,106 @@ def parse_arguments():
     parser = argparse.ArgumentParser(
         description="Client to test the Object Detection API server."
     )
-    parser.add_argument(
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument(
         "-i",
         "--image",
         type=str,
-        required=True,
         help="Path to the image file to send to the server.",
     )
+    source.add_argument(
+        "-v",
+        "--video",
+        type=str,
+        help="Path to a video file to stream detections for.",
+    )
+    parser.add_argument(
+        "-t",
+        "--tile",
+        action="store_true",
+        help="Detect on overlapping tiles to find small objects in large images.",
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        choices=["objects", "columns", "binary"],
+        default="objects",
+        help="Response format to request from the server.",
+    )
+    parser.add_argument(
+        "--confidence-threshold",
+        type=float,
+        help="Only return detections at least this confident.",
+    )
+    parser.add_argument(
+        "--classes",
+        help="Comma-separated class names or ids to keep, e.g. 'person,car'.",
+    )
+    parser.add_argument(
+        "--max-detections",
+        type=int,
+        help="Only return this many of the most confident detections.",
+    )
+    parser.add_argument(
+        "--skip-duplicates",
+        action="store_true",
+        help="Reuse detections for near-duplicate video frames.",
+    )
     return parser.parse_args()
 
 
-def check_image_file(image_path):
-    if not os.path.isfile(image_path):
-        logging.error(f"Image file '{image_path}' does not exist.")
+def check_file(path):
+    if not os.path.isfile(path):
+        logging.error(f"File '{path}' does not exist.")
         return False
     return True
 
 
-def send_image_to_server(image_path, url):
+def detections_from_json(detections):
+    """Build ``sv.Detections`` and labels from the objects or columns format."""
+    if isinstance(detections, list):
+        # One object per detection, turned into the columnar layout
+        detections = {
+            key: [detection[key] for detection in detections]
+            for key in ("class_id", "class_name", "confidence", "bbox")
+        }
+    class_id = np.array(detections["class_id"], dtype=int)
+    confidence = np.array(detections["confidence"], dtype=float)
+    xyxy = np.array(detections["bbox"], dtype=float).reshape(-1, 4)
+    sv_detections = sv.Detections(xyxy=xyxy, confidence=confidence, class_id=class_id)
+    labels = [
+        f"{name} {score:.2f}"
+        for name, score in zip(detections["class_name"], confidence)
+    ]
+    return sv_detections, labels
+
+
+def parse_detections(response):
+    """Build ``sv.Detections`` and labels from any of the response formats."""
+    if response.headers["content-type"] != "application/octet-stream":
+        return detections_from_json(response.json()["detections"])
+
+    shape = tuple(map(int, response.headers["X-Detection-Shape"].split(",")))
+    rows = np.frombuffer(response.content, dtype="<f4").reshape(shape)
+    names = json.loads(response.headers["X-Class-Names"])
+    class_id = rows[:, 5].astype(int)
+    sv_detections = sv.Detections(
+        xyxy=rows[:, :4], confidence=rows[:, 4], class_id=class_id
+    )
+    labels = [f"{names[str(i)]} {score:.2f}" for i, score in zip(class_id, rows[:, 4])]
+    return sv_detections, labels
+
+
+def send_image_to_server(image_path, url, options):
     try:
         with open(image_path, "rb") as image_file:
             files = {"request": image_file}
-            response = requests.post(url, files=files)
+            data = {key: value for key, value in options.items() if value is not None}
+            response = requests.post(url, files=files, data=data)
 
         if response.status_code == 200:
-            logging.info("Result: %s", response.json())
-
-            detections = response.json()["detections"]
-            sv_detections = sv.Detections(
-                class_id=np.array([detection["class_id"] for detection in detections]),
-                confidence=np.array(
-                    [detection["confidence"] for detection in detections]
-                ),
-                xyxy=np.array([detection["bbox"] for detection in detections]),
-            )
-            labels = [
-                f"{detection['class_name']} {detection['confidence']:.2f}"
-                for detection in detections
-            ]
+            sv_detections, labels = parse_detections(response)
+            logging.info("Detections (%d): %s", len(labels), labels)
 
             annotated_image = Image.open(image_path)
             annotated_image = sv.BoxAnnotator().annotate(annotated_image, sv_detections)
@@ -67,7 +130,38 @@ def send_image_to_server(image_path, url):
 
         else:
             logging.error("Error: %s %s", response.status_code, response.text)
-    except Exception as e:
+    except (requests.RequestException, OSError, ValueError, KeyError) as e:
+        logging.error("An error occurred: %s", str(e))
+
+
+def stream_video_to_server(video_path, url, options):
+    """Print the detections of each frame as the server streams them."""
+    try:
+        with open(video_path, "rb") as video_file:
+            files = {"request": video_file}
+            data = {key: value for key, value in options.items() if value is not None}
+            response = requests.post(url, files=files, data=data, stream=True)
+
+        if response.status_code != 200:
+            logging.error("Error: %s %s", response.status_code, response.text)
+            return
+        for line in response.iter_lines():
+            if not line:
+                continue
+            result = json.loads(line)
+            if "error" in result:
+                logging.error("Error: %s", result["error"])
+                return
+            _, labels = detections_from_json(result["detections"])
+            duplicate = result.get("duplicate_of")
+            logging.info(
+                "Frame %d (%.2fs)%s: %s",
+                result["frame"],
+                result.get("timestamp", 0.0),
+                f" same as frame {duplicate}" if duplicate is not None else "",
+                labels,
+            )
+    except (requests.RequestException, OSError, ValueError, KeyError) as e:
         logging.error("An error occurred: %s", str(e))
 
 
@@ -75,9 +169,23 @@ def main():
     logging.basicConfig(level=logging.INFO)
     args = parse_arguments()
 
-    if check_image_file(args.image):
+    options = {
+        "format": args.format,
+        "confidence_threshold": args.confidence_threshold,
+        "class_filter": args.classes,
+        "max_detections": args.max_detections,
+    }
+    if args.video:
+        if args.format == "binary":
+            logging.error("Video detections are streamed as objects or columns.")
+        elif check_file(args.video):
+            options["skip_duplicates"] = str(args.skip_duplicates).lower()
+            API_URL = "http://localhost:8000/predict/video"
+            stream_video_to_server(args.video, API_URL, options)
+    elif check_file(args.image):
+        options["tile"] = str(args.tile).lower()
         API_URL = "http://localhost:8000/predict"
-        send_image_to_server(args.image, API_URL)
+        send_image_to_server(args.image, API_URL, options)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,99 @@
+"""Filtering and response formats for detection results.
+
+Detections are filtered with NumPy masks and serialized straight from the
+``sv.Detections`` arrays, so no Python objects are built per box for the
+columnar and binary formats.
+"""
+
+import json
+from typing import Dict, Optional
+
+import numpy as np
+import supervision as sv
+from fastapi import Response
+
+FORMATS = ("objects", "columns", "binary")
+# Column order of the binary format's float32 rows
+BINARY_COLUMNS = ("x1", "y1", "x2", "y2", "confidence", "class_id")
+
+
+def filter_detections(
+    detections: sv.Detections,
+    confidence_threshold: float = 0.0,
+    class_ids: Optional[np.ndarray] = None,
+    max_detections: Optional[int] = None,
+) -> sv.Detections:
+    """Keep detections above ``confidence_threshold`` whose class is in
+    ``class_ids``, and at most the ``max_detections`` most confident ones."""
+    mask = detections.confidence >= confidence_threshold
+    if class_ids is not None:
+        mask &= np.isin(detections.class_id, class_ids)
+    detections = detections[mask]
+    if max_detections is not None and len(detections) > max_detections:
+        top = np.argsort(-detections.confidence, kind="stable")[:max_detections]
+        detections = detections[top]
+    return detections
+
+
+def encode_objects(detections: sv.Detections, class_names: Dict[int, str]) -> dict:
+    """One object per detection."""
+    return {
+        "detections": [
+            {
+                "class_id": class_id,
+                "class_name": class_names[class_id],
+                "confidence": confidence,
+                "bbox": bbox,
+            }
+            for class_id, confidence, bbox in zip(
+                detections.class_id.tolist(),
+                detections.confidence.tolist(),
+                detections.xyxy.tolist(),
+            )
+        ]
+    }
+
+
+def encode_columns(detections: sv.Detections, class_names: Dict[int, str]) -> dict:
+    """Parallel arrays, one per field, indexed by detection."""
+    class_ids = detections.class_id.tolist()
+    return {
+        "detections": {
+            "class_id": class_ids,
+            "class_name": [class_names[class_id] for class_id in class_ids],
+            "confidence": detections.confidence.tolist(),
+            "bbox": detections.xyxy.tolist(),
+        }
+    }
+
+
+def encode_binary(detections: sv.Detections, class_names: Dict[int, str]) -> Response:
+    """A little-endian float32 ``(n, 6)`` matrix with the
+    :data:`BINARY_COLUMNS` of each detection, returned as raw bytes.
+
+    The names of the classes present are sent in the ``X-Class-Names`` header.
+    """
+    rows = np.empty((len(detections), len(BINARY_COLUMNS)), dtype="<f4")
+    rows[:, :4] = detections.xyxy
+    rows[:, 4] = detections.confidence
+    rows[:, 5] = detections.class_id
+    names = {
+        class_id: class_names[class_id]
+        for class_id in np.unique(detections.class_id).tolist()
+    }
+    return Response(
+        content=rows.tobytes(),
+        media_type="application/octet-stream",
+        headers={
+            "X-Detection-Shape": ",".join(map(str, rows.shape)),
+            "X-Detection-Columns": ",".join(BINARY_COLUMNS),
+            "X-Class-Names": json.dumps(names),
+        },
+    )
+
+
+ENCODERS = {
+    "objects": encode_objects,
+    "columns": encode_columns,
+    "binary": encode_binary,
+}
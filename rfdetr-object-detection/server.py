@@ -3,49 +3,289 @@
 Provides HTTP endpoints for detecting objects in uploaded images.
 """
 
+import os
+
+import numpy as np
 import supervision as sv
-from fastapi import UploadFile
+from encoding import ENCODERS, FORMATS, filter_detections
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
 from litserve import LitAPI, LitServer
 from PIL import Image
 from rfdetr import RFDETRBase
 from rfdetr.util.coco_classes import COCO_CLASSES
+from tiling import merge_tiles, tile_windows
+from video import FrameReader, image_frames, open_video
 
 
 class ObjectDetectionAPI(LitAPI):
-    """API for object detection using RF-DETR model."""
+    """API for object detection using RF-DETR model.
+
+    Images from concurrent requests are detected in one batched forward pass.
+    Requests sent with ``tile=true`` are also sliced into overlapping
+    ``tile_size`` tiles, so small objects in large images are seen at the
+    model's scale; the tiles go into the same batch as the full image and
+    their boxes are merged with non-maximum suppression.
+
+    Requests can narrow the results with ``confidence_threshold``,
+    ``class_filter`` (comma-separated class ids or names) and
+    ``max_detections``, and pick the response ``format``: a list of
+    ``"objects"`` (the default), parallel ``"columns"``, or ``"binary"``
+    float32 rows. An upload that is not an image, or an invalid field, gets
+    its own 400 without failing the rest of its batch.
+
+    Args:
+        threshold: Minimum confidence of returned detections.
+        tile_size: Tile width and height in pixels, RF-DETR Base's input size
+            by default.
+        tile_overlap: Fraction of a tile shared with each neighbour.
+        max_images_per_batch: Upper bound on the images (full images and
+            tiles) in one forward pass, to cap memory use.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.5,
+        tile_size: int = 560,
+        tile_overlap: float = 0.2,
+        max_images_per_batch: int = 64,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.threshold = threshold
+        self.tile_size = tile_size
+        self.tile_overlap = tile_overlap
+        self.max_images_per_batch = max_images_per_batch
 
     def setup(self, device):
         # Load the model
         self.model = RFDETRBase()
         self.model.model.model.to(device)
         self.coco_classes = COCO_CLASSES
+        self.class_ids = {name: class_id for class_id, name in COCO_CLASSES.items()}
 
-    def decode_request(self, request: UploadFile) -> Image:
-        with Image.open(request.file) as img:
-            image = img.convert("RGB")
-        return image
+    def decode_request(self, request):
+        # Errors are returned rather than raised, so that LitServe does not
+        # fail the other requests of the batch
+        try:
+            options = self.parse_options(request)
+        except HTTPException as e:
+            return e
+        if "request" not in request:
+            return HTTPException(status_code=400, detail="Missing image file 'request'")
+        try:
+            with Image.open(request["request"].file) as img:
+                image = img.convert("RGB")
+        except (OSError, ValueError, Image.DecompressionBombError):
+            return HTTPException(
+                status_code=400, detail="Upload is not a readable image"
+            )
+        tile = str(request.get("tile", "false")).lower() in ("1", "true")
+        return image, tile, options
 
-    def predict(self, image) -> sv.Detections:
-        return self.model.predict(image)
+    def parse_options(self, request) -> dict:
+        """Validate the filtering and format fields of a request.
 
-    def encode_response(self, detections: sv.Detections):
-        return {
-            "detections": [
-                {
-                    "class_id": int(class_id),
-                    "class_name": self.coco_classes[int(class_id)],
-                    "confidence": float(confidence),
-                    "bbox": bbox.tolist(),
-                }
-                for class_id, confidence, bbox in zip(
-                    detections.class_id,
-                    detections.confidence,
-                    detections.xyxy,
+        Raises an ``HTTPException`` for an invalid field.
+        """
+        response_format = request.get("format", "objects")
+        if response_format not in FORMATS:
+            raise HTTPException(
+                status_code=400, detail=f"format must be one of {', '.join(FORMATS)}"
+            )
+
+        try:
+            confidence_threshold = float(request.get("confidence_threshold", 0))
+        except ValueError:
+            confidence_threshold = -1
+        if not 0 <= confidence_threshold <= 1:
+            raise HTTPException(
+                status_code=400,
+                detail="confidence_threshold must be a number between 0 and 1",
+            )
+
+        max_detections = request.get("max_detections")
+        if max_detections is not None:
+            try:
+                max_detections = int(max_detections)
+            except ValueError:
+                max_detections = 0
+            if max_detections < 1:
+                raise HTTPException(
+                    status_code=400, detail="max_detections must be a positive integer"
                 )
-            ]
+
+        class_ids = None
+        if request.get("class_filter"):
+            class_ids = []
+            for name in request["class_filter"].split(","):
+                name = name.strip()
+                class_id = int(name) if name.isdigit() else self.class_ids.get(name)
+                if class_id not in self.coco_classes:
+                    raise HTTPException(
+                        status_code=400,
+                        detail=f"Unknown class {name!r} in class_filter",
+                    )
+                class_ids.append(class_id)
+            class_ids = np.array(class_ids)
+
+        return {
+            "format": response_format,
+            "confidence_threshold": confidence_threshold,
+            "class_ids": class_ids,
+            "max_detections": max_detections,
         }
 
+    def batch(self, inputs):
+        return list(inputs)
+
+    def predict(self, x):
+        batched = self.max_batch_size > 1
+        inputs = x if batched else self.batch([x])
+        outputs = list(inputs)
+        valid = [
+            i for i, item in enumerate(inputs) if not isinstance(item, HTTPException)
+        ]
+
+        # One flat list of images: each request's full image, then its tiles
+        images, windows = [], []
+        for image, tile, _ in (inputs[i] for i in valid):
+            if tile:
+                image_windows = tile_windows(
+                    *image.size, self.tile_size, self.tile_overlap
+                )
+                images += [image.crop(tuple(window)) for window in image_windows]
+            else:
+                image_windows = None
+                images.append(image)
+            windows.append(image_windows)
+
+        detections = self.detect(images) if images else []
+        start = 0
+        for i, image_windows in zip(valid, windows):
+            if image_windows is None:
+                result = detections[start]
+                start += 1
+            else:
+                end = start + len(image_windows)
+                result = merge_tiles(detections[start:end], image_windows)
+                start = end
+            outputs[i] = (result, inputs[i][2])
+        return outputs if batched else outputs[0]
+
+    def detect(self, images) -> list:
+        """Run the model on ``images`` in batches of ``max_images_per_batch``."""
+        detections = []
+        for start in range(0, len(images), self.max_images_per_batch):
+            chunk = images[start : start + self.max_images_per_batch]
+            result = self.model.predict(chunk, threshold=self.threshold)
+            # RF-DETR unwraps the list when it holds a single image
+            detections += [result] if isinstance(result, sv.Detections) else result
+        return detections
+
+    def unbatch(self, output):
+        return output
+
+    def encode_response(self, output):
+        if isinstance(output, HTTPException):
+            return JSONResponse(
+                status_code=output.status_code, content={"detail": output.detail}
+            )
+        detections, options = output
+        detections = filter_detections(
+            detections,
+            options["confidence_threshold"],
+            options["class_ids"],
+            options["max_detections"],
+        )
+        return ENCODERS[options["format"]](detections, self.coco_classes)
+
+
+class VideoDetectionAPI(ObjectDetectionAPI):
+    """Streams detections for a video file, or for a sequence of images sent
+    as repeated ``frames`` fields, one JSON line per frame.
+
+    Frames are decoded on a background thread while the model runs, and each
+    batch takes the frames already decoded, up to ``frame_batch_size``. With
+    ``skip_duplicates=true``, frames that barely differ from the last detected
+    frame (mean absolute difference of 64x64 grayscale thumbnails below
+    ``duplicate_threshold``) reuse its detections instead of running the model.
+    """
+
+    def __init__(
+        self, frame_batch_size: int = 8, duplicate_threshold: float = 2.0, **kwargs
+    ):
+        super().__init__(stream=True, **kwargs)
+        self.frame_batch_size = frame_batch_size
+        self.duplicate_threshold = duplicate_threshold
+
+    def decode_request(self, request):
+        try:
+            options = self.parse_options(request)
+            if options["format"] == "binary":
+                raise HTTPException(
+                    status_code=400, detail="format must be objects or columns"
+                )
+            if "request" in request:
+                video = request["request"]
+                frames = open_video(
+                    video.file.read(), os.path.splitext(video.filename or "")[1]
+                )
+            elif "frames" in request:
+                frames = image_frames(
+                    [f.file.read() for f in request.getlist("frames")]
+                )
+            else:
+                raise HTTPException(
+                    status_code=400,
+                    detail="Send a video as request or images as frames",
+                )
+        except ValueError as e:
+            return str(e)
+        except HTTPException as e:
+            # The response status is sent before the stream starts, so errors
+            # are reported as the only line of the stream
+            return e.detail
+
+        skip_duplicates = str(request.get("skip_duplicates", "false")).lower()
+        threshold = (
+            self.duplicate_threshold if skip_duplicates in ("1", "true") else None
+        )
+        return FrameReader(frames, duplicate_threshold=threshold), options
+
+    def predict(self, inputs):
+        if isinstance(inputs, str):
+            yield inputs
+            return
+        reader, options = inputs
+        for frames in reader.batches(self.frame_batch_size):
+            detections = iter(
+                self.detect(
+                    [frame.image for frame in frames if frame.image is not None]
+                )
+            )
+            for frame in frames:
+                if frame.image is not None:
+                    last_detections = next(detections)
+                yield frame, last_detections, options
+
+    def encode_response(self, outputs):
+        for output in outputs:
+            if isinstance(output, str):
+                yield {"error": output}
+                continue
+            frame, detections, options = output
+            response = {"frame": frame.index}
+            if frame.timestamp is not None:
+                response["timestamp"] = round(frame.timestamp, 3)
+            if frame.duplicate_of is not None:
+                response["duplicate_of"] = frame.duplicate_of
+            response.update(super().encode_response((detections, options)))
+            yield response
+
 
 if __name__ == "__main__":
-    server = LitServer(ObjectDetectionAPI(), track_requests=True)
+    api = ObjectDetectionAPI(max_batch_size=8, batch_timeout=0.05)
+    video_api = VideoDetectionAPI(api_path="/predict/video")
+    server = LitServer([api, video_api], track_requests=True)
     server.run(port=8000)
@@ -0,0 +1,126 @@
+"""Throughput and small-object recall of batched and tiled detection.
+
+Runs decode_request, batch and predict in process, the way a LitServe worker
+does. Throughput is measured on street.jpg and a 4032x3024 upscale of it,
+one image per call (the unbatched path) and in batches, with and without
+tiling.
+
+Recall uses a grid of copies of street.jpg as a stand-in for a large scene:
+the detections on a single copy, shifted into every cell, are the reference
+boxes, and a reference box counts as found when a detection of the same
+class overlaps it with IoU >= 0.5. Run from the rfdetr-object-detection
+folder:
+
+    python tests/benchmark.py
+"""
+
+import io
+import os
+import sys
+import time
+
+import numpy as np
+import supervision as sv
+import torch
+from fastapi import UploadFile
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from server import ObjectDetectionAPI
+
+SAMPLE_FILE = os.path.join(os.path.dirname(__file__), "..", "street.jpg")
+# COCO size buckets, by box area in pixels
+SIZES = {"small": (0, 32**2), "medium": (32**2, 96**2), "large": (96**2, np.inf)}
+
+
+def to_jpeg(image: Image.Image) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=95)
+    return buffer.getvalue()
+
+
+def run(api: ObjectDetectionAPI, images: list, tile: bool) -> list:
+    inputs = [
+        api.decode_request({"request": UploadFile(io.BytesIO(data)), "tile": tile})
+        for data in images
+    ]
+    if api.max_batch_size == 1:
+        return [api.predict(x) for x in inputs]
+    return api.unbatch(api.predict(api.batch(inputs)))
+
+
+def benchmark_throughput(image: Image.Image, batch_sizes=(1, 4, 8)):
+    images = {
+        f"{image.width}x{image.height}": to_jpeg(image),
+        "4032x3024": to_jpeg(image.resize((4032, 3024))),
+    }
+    print("Throughput (decode + batch + predict, images/s)")
+    for tile in (False, True):
+        for batch_size in batch_sizes:
+            api = ObjectDetectionAPI(max_batch_size=batch_size)
+            api.setup("cuda" if torch.cuda.is_available() else "cpu")
+            results = []
+            for name, data in images.items():
+                num_batches = max(16 // batch_size, 2)
+                run(api, [data] * batch_size, tile)  # warm up
+                start = time.perf_counter()
+                for _ in range(num_batches):
+                    run(api, [data] * batch_size, tile)
+                elapsed = time.perf_counter() - start
+                results.append(f"{name} {num_batches * batch_size / elapsed:7.2f}")
+            mode = "tiled" if tile else "full "
+            print(f"  {mode} batch {batch_size:>2}: " + "  ".join(results))
+
+
+def recall(reference: sv.Detections, detections: sv.Detections) -> dict:
+    iou = sv.box_iou_batch(reference.xyxy, detections.xyxy)
+    same_class = reference.class_id[:, None] == detections.class_id[None, :]
+    found = ((iou >= 0.5) & same_class).any(axis=1)
+    results = {}
+    for name, (low, high) in SIZES.items():
+        in_bucket = (reference.area >= low) & (reference.area < high)
+        if in_bucket.any():
+            results[name] = f"{found[in_bucket].mean():.2f} ({in_bucket.sum()})"
+    results["all"] = f"{found.mean():.2f} ({len(found)})"
+    return results
+
+
+def benchmark_recall(image: Image.Image, grid: int = 3):
+    api = ObjectDetectionAPI()
+    api.setup("cuda" if torch.cuda.is_available() else "cpu")
+    single, _ = api.predict(
+        api.decode_request({"request": UploadFile(io.BytesIO(to_jpeg(image)))})
+    )
+
+    mosaic = Image.new("RGB", (image.width * grid, image.height * grid))
+    offsets = []
+    for row in range(grid):
+        for col in range(grid):
+            mosaic.paste(image, (col * image.width, row * image.height))
+            offsets.append((col * image.width, row * image.height) * 2)
+    reference = sv.Detections.merge(
+        [
+            sv.Detections(
+                xyxy=single.xyxy + np.array(offset),
+                confidence=single.confidence,
+                class_id=single.class_id,
+            )
+            for offset in offsets
+        ]
+    )
+
+    print(f"Recall on a {mosaic.width}x{mosaic.height} mosaic (reference boxes)")
+    for tile in (False, True):
+        detections, _ = run(api, [to_jpeg(mosaic)], tile)[0]
+        results = "  ".join(
+            f"{k} {v}" for k, v in recall(reference, detections).items()
+        )
+        print(f"  {'tiled' if tile else 'full '}: {results}")
+
+
+if __name__ == "__main__":
+    print(f"torch threads: {torch.get_num_threads()}")
+    image = Image.open(SAMPLE_FILE).convert("RGB")
+    benchmark_throughput(image)
+    benchmark_recall(image)
@@ -0,0 +1,77 @@
+"""Time to filter and serialize crowded detection results in each format.
+
+Compares the original per-box encoding (``int``/``float`` casts and a
+``tolist()`` per box) against the ``objects``, ``columns`` and ``binary``
+formats, including JSON serialization. Run from the rfdetr-object-detection
+folder:
+
+    python tests/encoding_benchmark.py
+"""
+
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import supervision as sv
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from encoding import ENCODERS, filter_detections
+
+CLASS_NAMES = {class_id: f"class_{class_id}" for class_id in range(1, 91)}
+
+
+def make_detections(num_boxes: int) -> sv.Detections:
+    rng = np.random.default_rng(0)
+    top_left = rng.uniform(0, 1000, (num_boxes, 2))
+    return sv.Detections(
+        xyxy=np.hstack([top_left, top_left + rng.uniform(5, 200, (num_boxes, 2))]),
+        confidence=rng.uniform(0.5, 1, num_boxes).astype(np.float32),
+        class_id=rng.integers(1, 91, num_boxes),
+    )
+
+
+def per_box(detections: sv.Detections) -> dict:
+    return {
+        "detections": [
+            {
+                "class_id": int(class_id),
+                "class_name": CLASS_NAMES[int(class_id)],
+                "confidence": float(confidence),
+                "bbox": bbox.tolist(),
+            }
+            for class_id, confidence, bbox in zip(
+                detections.class_id, detections.confidence, detections.xyxy
+            )
+        ]
+    }
+
+
+def serialize(output) -> bytes:
+    if isinstance(output, dict):
+        return json.dumps(output).encode()
+    return output.body
+
+
+def microseconds(fn, detections: sv.Detections, repeats: int = 50) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        serialize(fn(detections, CLASS_NAMES))
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+if __name__ == "__main__":
+    encoders = {"per-box": lambda detections, _: per_box(detections), **ENCODERS}
+    print(f"{'boxes':>6}" + "".join(f"{name:>10}" for name in encoders) + "  (us)")
+    for num_boxes in (10, 100, 300, 1000):
+        detections = make_detections(num_boxes)
+        times = [microseconds(fn, detections) for fn in encoders.values()]
+        print(f"{num_boxes:>6}" + "".join(f"{t:>10.0f}" for t in times))
+
+    detections = make_detections(1000)
+    start = time.perf_counter()
+    filtered = filter_detections(detections, 0.8, np.array([1, 3]), 10)
+    elapsed = (time.perf_counter() - start) * 1e6
+    print(f"filter 1000 -> {len(filtered)} boxes: {elapsed:.0f} us")
@@ -0,0 +1,83 @@
+"""Tests for the tile windows and the non-maximum suppression of tiling.py.
+
+Run from the rfdetr-object-detection folder:
+
+    python -m pytest tests/test_tiling.py
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+import supervision as sv
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tiling import merge_tiles, nms_mask, tile_windows
+
+# Each box overlaps its neighbour with IoU 0.54, but the first and the third
+# overlap with IoU 0.25
+CHAIN = np.array([[0, 0, 10, 10], [3, 0, 13, 10], [6, 0, 16, 10]], dtype=np.float32)
+
+
+def test_suppressed_boxes_do_not_suppress():
+    mask = nms_mask(CHAIN, np.array([0.9, 0.8, 0.7]), np.zeros(3), 0.3, "iou")
+    assert mask.tolist() == [True, False, True]
+
+
+def test_matches_supervision_nms():
+    rng = np.random.default_rng(0)
+    top_left = rng.uniform(0, 100, (200, 2))
+    xyxy = np.hstack([top_left, top_left + rng.uniform(5, 30, (200, 2))])
+    confidence = rng.uniform(0, 1, 200)
+    class_id = rng.integers(0, 3, 200)
+    expected = sv.box_non_max_suppression(
+        np.hstack([xyxy, confidence[:, None], class_id[:, None]]), 0.3
+    )
+    mask = nms_mask(xyxy, confidence, class_id, 0.3, "iou")
+    assert mask.tolist() == expected.tolist()
+
+
+def test_classes_are_separate():
+    mask = nms_mask(CHAIN, np.array([0.9, 0.8, 0.7]), np.array([0, 1, 0]), 0.3, "iou")
+    assert mask.tolist() == [True, True, True]
+
+
+def test_ios_drops_partial_box():
+    xyxy = np.array([[0, 0, 100, 100], [0, 0, 40, 100]], dtype=np.float32)
+    mask = nms_mask(xyxy, np.array([0.9, 0.8]), np.zeros(2), 0.5, "ios")
+    assert mask.tolist() == [True, False]
+    assert nms_mask(xyxy, np.array([0.9, 0.8]), np.zeros(2), 0.5, "iou").all()
+
+
+def test_unknown_metric():
+    with pytest.raises(ValueError):
+        nms_mask(CHAIN, np.ones(3), np.zeros(3), metric="giou")
+
+
+def test_tile_windows_cover_image():
+    windows = tile_windows(1200, 700, tile_size=560, overlap=0.2)
+    assert windows[0].tolist() == [0, 0, 1200, 700]
+    assert windows[1:, 2].max() == 1200 and windows[1:, 3].max() == 700
+    assert ((windows[1:, 2:] - windows[1:, :2]) == 560).all()
+
+
+def test_small_image_has_one_window():
+    assert tile_windows(400, 300).tolist() == [[0, 0, 400, 300]]
+
+
+def test_merge_tiles_shifts_boxes():
+    windows = np.array([[0, 0, 1000, 1000], [500, 400, 1000, 1000]])
+    full = sv.Detections(
+        xyxy=np.array([[10, 10, 50, 50]], dtype=np.float32),
+        confidence=np.array([0.9]),
+        class_id=np.array([1]),
+    )
+    tile = sv.Detections(
+        xyxy=np.array([[0, 0, 20, 20]], dtype=np.float32),
+        confidence=np.array([0.8]),
+        class_id=np.array([1]),
+    )
+    merged = merge_tiles([full, tile], windows)
+    assert merged.xyxy.tolist() == [[10, 10, 50, 50], [500, 400, 520, 420]]
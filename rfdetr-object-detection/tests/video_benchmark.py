@@ -0,0 +1,85 @@
+"""Frames per second for a video sent frame by frame versus streamed.
+
+Compares one /predict request per JPEG-encoded frame with a single
+/predict/video request, with and without duplicate skipping, and reports the
+time to the first frame's detections. Run from the rfdetr-object-detection
+folder with the server running:
+
+    python tests/video_benchmark.py path/to/video.mp4
+"""
+
+import json
+import os
+import sys
+import time
+
+import cv2
+import requests
+
+SERVER_URL = os.getenv("SERVER_URL", "http://127.0.0.1:8000")
+
+
+def per_frame(video_path: str) -> dict:
+    capture = cv2.VideoCapture(video_path)
+    frames = []
+    while True:
+        ok, frame = capture.read()
+        if not ok:
+            break
+        frames.append(cv2.imencode(".jpg", frame)[1].tobytes())
+    capture.release()
+
+    start_time = time.time()
+    first_result = None
+    for frame in frames:
+        response = requests.post(f"{SERVER_URL}/predict", files={"request": frame})
+        response.raise_for_status()
+        if first_result is None:
+            first_result = time.time() - start_time
+    total_time = time.time() - start_time
+    return {"Frames": len(frames), "Time (s)": total_time, "First (s)": first_result}
+
+
+def streamed(video_path: str, skip_duplicates: bool) -> dict:
+    start_time = time.time()
+    first_result = None
+    num_frames = num_duplicates = 0
+    with open(video_path, "rb") as f:
+        response = requests.post(
+            f"{SERVER_URL}/predict/video",
+            files={"request": f},
+            data={"skip_duplicates": str(skip_duplicates).lower()},
+            stream=True,
+        )
+        for line in response.iter_lines():
+            result = json.loads(line)
+            if "error" in result:
+                raise RuntimeError(result["error"])
+            if first_result is None:
+                first_result = time.time() - start_time
+            num_frames += 1
+            num_duplicates += "duplicate_of" in result
+    total_time = time.time() - start_time
+    return {
+        "Frames": num_frames,
+        "Time (s)": total_time,
+        "First (s)": first_result,
+        "Skipped": num_duplicates,
+    }
+
+
+if __name__ == "__main__":
+    video_path = sys.argv[1]
+    streamed(video_path, skip_duplicates=False)  # warm up
+    runs = {
+        "per-frame": per_frame(video_path),
+        "stream": streamed(video_path, skip_duplicates=False),
+        "stream+skip": streamed(video_path, skip_duplicates=True),
+    }
+    for name, result in runs.items():
+        fps = result["Frames"] / result["Time (s)"]
+        details = "  ".join(
+            f"{key} {value:.2f}" if isinstance(value, float) else f"{key} {value}"
+            for key, value in result.items()
+        )
+        print(f"{name:>12}: {fps:7.1f} frames/s  {details}")
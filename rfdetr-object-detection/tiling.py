@@ -0,0 +1,98 @@
+"""Sliced (SAHI-style) inference helpers for large images.
+
+An image is cut into overlapping tiles that are detected at the model's own
+scale, then the tile detections are shifted back to image coordinates and
+merged with a class-aware non-maximum suppression.
+"""
+
+from typing import List
+
+import numpy as np
+import supervision as sv
+
+
+def _starts(length: int, tile_size: int, stride: int) -> List[int]:
+    if length <= tile_size:
+        return [0]
+    # The last tile is flush with the edge instead of hanging over it
+    return list(range(0, length - tile_size, stride)) + [length - tile_size]
+
+
+def tile_windows(
+    width: int, height: int, tile_size: int = 560, overlap: float = 0.2
+) -> np.ndarray:
+    """``(n, 4)`` xyxy windows covering the image, with ``overlap`` (a
+    fraction of ``tile_size``) shared between neighbouring tiles.
+
+    The first window is always the full image, so objects larger than a tile
+    are still detected whole. Images that fit in one tile get only that window.
+    """
+    windows = [(0, 0, width, height)]
+    if width > tile_size or height > tile_size:
+        stride = max(int(tile_size * (1 - overlap)), 1)
+        windows += [
+            (x, y, min(x + tile_size, width), min(y + tile_size, height))
+            for y in _starts(height, tile_size, stride)
+            for x in _starts(width, tile_size, stride)
+        ]
+    return np.array(windows, dtype=np.int64)
+
+
+def nms_mask(
+    xyxy: np.ndarray,
+    confidence: np.ndarray,
+    class_id: np.ndarray,
+    threshold: float = 0.5,
+    metric: str = "ios",
+) -> np.ndarray:
+    """Boolean mask of the boxes kept by class-aware non-maximum suppression.
+
+    All pairwise overlaps are computed as one matrix. Boxes are then visited
+    from the highest score down, and a box is dropped when it overlaps a
+    kept box of the same class by more than ``threshold``; boxes that were
+    dropped do not suppress others. ``metric`` is ``"iou"``, or ``"ios"`` (intersection over the
+    smaller box), which also removes the partial boxes of objects cut by a
+    tile edge.
+    """
+    if metric not in ("iou", "ios"):
+        raise ValueError(f"Unknown metric {metric!r}, expected 'iou' or 'ios'")
+    order = np.argsort(-confidence, kind="stable")
+    boxes = xyxy[order].astype(np.float32)
+    classes = class_id[order]
+
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    top_left = np.maximum(boxes[:, None, :2], boxes[None, :, :2])
+    bottom_right = np.minimum(boxes[:, None, 2:], boxes[None, :, 2:])
+    intersection = np.clip(bottom_right - top_left, 0, None).prod(axis=2)
+    if metric == "ios":
+        denominator = np.minimum(areas[:, None], areas[None, :])
+    else:
+        denominator = areas[:, None] + areas[None, :] - intersection
+    overlap = intersection / np.maximum(denominator, 1e-6)
+
+    # Row i suppresses column j when i scores higher and has the same class
+    suppresses = np.triu(overlap > threshold, k=1) & (classes[:, None] == classes)
+    keep = np.ones(len(order), dtype=bool)
+    for i in range(len(order)):
+        if keep[i]:
+            keep &= ~suppresses[i]
+    mask = np.zeros(len(order), dtype=bool)
+    mask[order[keep]] = True
+    return mask
+
+
+def merge_tiles(
+    detections: List[sv.Detections],
+    windows: np.ndarray,
+    threshold: float = 0.5,
+    metric: str = "ios",
+) -> sv.Detections:
+    """Shift each tile's detections by its window origin and merge them."""
+    merged = sv.Detections.merge(detections)
+    if len(merged) == 0:
+        return merged
+    counts = [len(tile) for tile in detections]
+    merged.xyxy = merged.xyxy + np.repeat(np.tile(windows[:, :2], 2), counts, axis=0)
+    return merged[
+        nms_mask(merged.xyxy, merged.confidence, merged.class_id, threshold, metric)
+    ]
@@ -0,0 +1,165 @@
+"""Background frame decoding for video and frame-stream detection."""
+
+import io
+import os
+import queue
+import tempfile
+import threading
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image
+
+# Marks the end of the frames in the queue
+_DONE = object()
+
+
+@dataclass
+class Frame:
+    index: int
+    timestamp: Optional[float]
+    # None for a near-duplicate of frame ``duplicate_of``
+    image: Optional[np.ndarray]
+    duplicate_of: Optional[int] = None
+
+
+def open_video(data: bytes, suffix: str = "") -> Iterator[Tuple[float, np.ndarray]]:
+    """Open a video file and return its ``(seconds, RGB frame)`` pairs.
+
+    Raises ``ValueError`` right away if OpenCV cannot read the video.
+    """
+    # OpenCV only opens videos from a path
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        capture.release()
+        os.remove(path)
+        raise ValueError("Could not read the video")
+    return _read_video(capture, path)
+
+
+def _read_video(capture, path: str) -> Iterator[Tuple[float, np.ndarray]]:
+    try:
+        while True:
+            ok, frame = capture.read()
+            if not ok:
+                break
+            timestamp = capture.get(cv2.CAP_PROP_POS_MSEC) / 1000
+            yield timestamp, cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    finally:
+        capture.release()
+        os.remove(path)
+
+
+def image_frames(images: List[bytes]) -> Iterator[Tuple[None, np.ndarray]]:
+    """Decode a sequence of encoded images to ``(None, RGB frame)`` pairs."""
+    for data in images:
+        with Image.open(io.BytesIO(data)) as img:
+            yield None, np.asarray(img.convert("RGB"))
+
+
+def thumbnail(frame: np.ndarray, size: int = 64) -> np.ndarray:
+    """Small grayscale copy of a frame for cheap frame differencing."""
+    gray = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)
+    return cv2.resize(gray, (size, size), interpolation=cv2.INTER_AREA).astype(
+        np.float32
+    )
+
+
+class FrameReader:
+    """Decodes frames on a background thread while the model runs.
+
+    Decoded frames wait in a queue of at most ``max_queued`` frames, so a slow
+    model holds back decoding instead of buffering the whole video. With a
+    ``duplicate_threshold``, a frame whose thumbnail differs from the last
+    kept frame's by less than that mean absolute difference (0-255 scale) is
+    passed on without its image, as a duplicate of that frame.
+    """
+
+    def __init__(
+        self,
+        frames: Iterator[Tuple[Optional[float], np.ndarray]],
+        max_queued: int = 32,
+        duplicate_threshold: Optional[float] = None,
+    ):
+        self.frames = frames
+        self.duplicate_threshold = duplicate_threshold
+        self.queue = queue.Queue(maxsize=max_queued)
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._read, daemon=True)
+        self.thread.start()
+
+    def _put(self, item) -> bool:
+        while not self.stopped.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _get(self):
+        # A decoder that died on an unexpected error never sends _DONE
+        while True:
+            try:
+                return self.queue.get(timeout=0.1)
+            except queue.Empty:
+                if not self.thread.is_alive() and self.queue.empty():
+                    raise RuntimeError("The frame decoder stopped unexpectedly")
+
+    def _read(self):
+        kept_index, kept_thumbnail = None, None
+        try:
+            for index, (timestamp, image) in enumerate(self.frames):
+                frame = Frame(index, timestamp, image)
+                if self.duplicate_threshold is not None:
+                    small = thumbnail(image)
+                    if (
+                        kept_thumbnail is not None
+                        and np.abs(small - kept_thumbnail).mean()
+                        < self.duplicate_threshold
+                    ):
+                        frame = Frame(index, timestamp, None, duplicate_of=kept_index)
+                    else:
+                        kept_index, kept_thumbnail = index, small
+                if not self._put(frame):
+                    return
+        except (OSError, ValueError, Image.DecompressionBombError, cv2.error) as e:
+            # An unreadable frame; batches() raises it in the worker
+            self._put(e)
+            return
+        finally:
+            self.frames.close()
+        self._put(_DONE)
+
+    def batches(self, max_size: int) -> Iterator[List[Frame]]:
+        """Yield lists of up to ``max_size`` frames.
+
+        Waits for the first frame of a batch, then takes whatever else is
+        already decoded, so batches grow when the model is the bottleneck
+        without holding frames back to fill them.
+        """
+        try:
+            while True:
+                batch = [self._get()]
+                while len(batch) < max_size and isinstance(batch[-1], Frame):
+                    try:
+                        batch.append(self.queue.get_nowait())
+                    except queue.Empty:
+                        break
+                end = batch[-1]
+                if isinstance(end, Frame):
+                    yield batch
+                    continue
+                if len(batch) > 1:
+                    yield batch[:-1]
+                if end is _DONE:
+                    return
+                raise end
+        finally:
+            # Stops the decoder if the client went away
+            self.stopped.set()
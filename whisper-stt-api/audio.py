@@ -0,0 +1,104 @@
+"""In-memory and incremental audio decoding for transcription.
+
+Formats libsndfile can read (wav, flac, ogg, mp3) are decoded straight from
+the uploaded bytes. Anything else falls back to ffmpeg, as whisper does.
+"""
+
+import io
+import subprocess
+import tempfile
+from typing import Iterator
+
+import numpy as np
+import soundfile as sf
+import soxr
+from whisper.audio import SAMPLE_RATE, load_audio
+
+
+def _to_whisper_audio(audio: np.ndarray, sample_rate: int) -> np.ndarray:
+    """Downmix ``(frames, channels)`` audio and resample it to 16 kHz."""
+    audio = audio.mean(axis=1)
+    if sample_rate != SAMPLE_RATE:
+        audio = soxr.resample(audio, sample_rate, SAMPLE_RATE)
+    return np.ascontiguousarray(audio, dtype=np.float32)
+
+
+def decode_audio(data: bytes) -> np.ndarray:
+    """Decode an audio file to 16 kHz mono float32 samples, in memory when
+    libsndfile supports the format."""
+    try:
+        audio, sample_rate = sf.read(io.BytesIO(data), dtype="float32", always_2d=True)
+    except sf.SoundFileError:
+        with tempfile.NamedTemporaryFile() as temp_file:
+            temp_file.write(data)
+            temp_file.flush()
+            return load_audio(temp_file.name)
+    return _to_whisper_audio(audio, sample_rate)
+
+
+def iter_audio_windows(
+    data: bytes, window_seconds: float = 30.0
+) -> Iterator[np.ndarray]:
+    """Decode an audio file and yield fixed-length windows of 16 kHz mono
+    float32 samples as soon as each one is decoded.
+
+    The last window may be shorter than ``window_seconds``.
+    """
+    try:
+        sound_file = sf.SoundFile(io.BytesIO(data))
+    except sf.SoundFileError:
+        yield from _iter_ffmpeg_windows(data, window_seconds)
+        return
+
+    with sound_file:
+        blocksize = int(window_seconds * sound_file.samplerate)
+        for block in sound_file.blocks(blocksize, dtype="float32", always_2d=True):
+            yield _to_whisper_audio(block, sound_file.samplerate)
+
+
+def _iter_ffmpeg_windows(data: bytes, window_seconds: float) -> Iterator[np.ndarray]:
+    # Same conversion as whisper.audio.load_audio, but read from the pipe
+    # one window at a time instead of waiting for the whole file
+    with tempfile.NamedTemporaryFile() as temp_file:
+        temp_file.write(data)
+        temp_file.flush()
+        cmd = [
+            "ffmpeg",
+            "-nostdin",
+            "-loglevel",
+            "error",  # keeps stderr small so the unread pipe never fills up
+            "-threads",
+            "0",
+            "-i",
+            temp_file.name,
+            "-f",
+            "s16le",
+            "-ac",
+            "1",
+            "-acodec",
+            "pcm_s16le",
+            "-ar",
+            str(SAMPLE_RATE),
+            "-",
+        ]
+        window_bytes = int(window_seconds * SAMPLE_RATE) * 2  # 16-bit samples
+        process = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            stdin=subprocess.DEVNULL,
+        )
+        try:
+            decoded_any = False
+            while chunk := process.stdout.read(window_bytes):
+                decoded_any = True
+                yield np.frombuffer(chunk, np.int16).astype(np.float32) / 32768.0
+
+            if process.wait() != 0 and not decoded_any:
+                raise RuntimeError(
+                    f"Failed to load audio: {process.stderr.read().decode()}"
+                )
+        finally:
+            process.kill()
+            process.stdout.close()
+            process.stderr.close()
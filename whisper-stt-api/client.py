@@ -1,4 +1,6 @@
 import argparse
+import json
+
 import requests
 
 
@@ -14,8 +16,18 @@ def main():
         required=True,
         help="Path to the audio file to be transcribed",
     )
+    parser.add_argument(
+        "-s",
+        "--stream",
+        action="store_true",
+        help="Print segments as they are transcribed",
+    )
     args = parser.parse_args()
 
+    if args.stream:
+        stream_transcription(args.audio_file)
+        return
+
     # API endpoint URL
     url = "http://localhost:8000/transcribe"
 
@@ -31,5 +43,23 @@ def main():
         print("Error:", response.status_code, response.text)
 
 
+def stream_transcription(audio_file):
+    url = "http://localhost:8000/transcribe/stream"
+    with open(audio_file, "rb") as audio:
+        response = requests.post(url, files={"audio": audio}, stream=True)
+
+        if response.status_code != 200:
+            print("Error:", response.status_code, response.text)
+            return
+
+        # One JSON segment per line, sent as each window is transcribed
+        for line in response.iter_lines():
+            if line:
+                segment = json.loads(line)
+                print(
+                    f"[{segment['start']:.2f} -> {segment['end']:.2f}]{segment['text']}"
+                )
+
+
 if __name__ == "__main__":
     main()
@@ -1,26 +1,155 @@
-import tempfile
+from typing import List, Optional, Tuple
+
 import litserve as ls
+import numpy as np
+import torch
 import whisper
+from audio import decode_audio, iter_audio_windows
+from vad import SpeechTimeline, drop_silence
+from whisper.audio import N_SAMPLES, SAMPLE_RATE
 
 
 class WhisperAPI(ls.LitAPI):
+    """Speech to text with Whisper.
+
+    With ``max_batch_size > 1``, concurrent requests are transcribed together:
+    their audio is cut into 30 s windows and up to ``max_batch_windows``
+    windows go through the encoder and decoder in one call.
+
+    With ``skip_silence=True``, silent stretches are cut out before
+    transcription and responses report how many seconds were skipped.
+    """
+
+    def __init__(
+        self, max_batch_windows: int = 16, skip_silence: bool = False, **kwargs
+    ):
+        super().__init__(**kwargs)
+        self.max_batch_windows = max_batch_windows
+        self.skip_silence = skip_silence
+
     def setup(self, device):
         self.model = whisper.load_model("tiny", device=device)
+        self.decode_options = whisper.DecodingOptions(
+            language="en",
+            without_timestamps=True,
+            fp16=self.model.device.type == "cuda",
+        )
 
     def decode_request(self, request):
-        with tempfile.NamedTemporaryFile() as temp_file:
-            temp_file.write(request["audio"].file.read())
-            audio_data = whisper.audio.load_audio(temp_file.name)
-        return audio_data
+        return decode_audio(request["audio"].file.read())
+
+    def batch(self, inputs):
+        # Clips have different lengths, so keep them as a list
+        return list(inputs)
 
     def predict(self, audio_data):
-        return self.model.transcribe(audio_data, language="en")
+        if self.max_batch_size > 1:
+            return self.transcribe_batch(audio_data)
+        speech, timeline = self.remove_silence(audio_data)
+        text = (
+            self.model.transcribe(speech, language="en")["text"] if len(speech) else ""
+        )
+        return self._output(text, timeline)
+
+    def remove_silence(
+        self, audio: np.ndarray
+    ) -> Tuple[np.ndarray, Optional[SpeechTimeline]]:
+        """Drop silent regions when ``skip_silence`` is enabled."""
+        if not self.skip_silence:
+            return audio, None
+        return drop_silence(audio)
+
+    def _output(self, text: str, timeline: Optional[SpeechTimeline]) -> dict:
+        output = {"text": text}
+        if timeline is not None:
+            output["audio_seconds_skipped"] = round(timeline.skipped_seconds, 2)
+        return output
+
+    @torch.inference_mode()
+    def transcribe_batch(self, batch: List[np.ndarray]) -> List[dict]:
+        """Transcribe several clips with batched 30 s log-mel windows."""
+        windows, owners, timelines = [], [], []
+        for i, audio in enumerate(batch):
+            audio, timeline = self.remove_silence(audio)
+            timelines.append(timeline)
+            for start in range(0, len(audio), N_SAMPLES):
+                windows.append(audio[start : start + N_SAMPLES])
+                owners.append(i)
+
+        texts = [[] for _ in batch]
+        for start in range(0, len(windows), self.max_batch_windows):
+            mel = torch.stack(
+                [
+                    whisper.log_mel_spectrogram(
+                        whisper.pad_or_trim(window),
+                        self.model.dims.n_mels,
+                        device=self.model.device,
+                    )
+                    for window in windows[start : start + self.max_batch_windows]
+                ]
+            )
+            results = whisper.decode(self.model, mel, self.decode_options)
+            for owner, result in zip(owners[start:], results):
+                texts[owner].append(result.text.strip())
+
+        return [
+            self._output(" ".join(filter(None, parts)), timeline)
+            for parts, timeline in zip(texts, timelines)
+        ]
+
+    def encode_response(self, output):
+        return output
+
+
+class WhisperStreamingAPI(WhisperAPI):
+    """Transcribes audio in fixed windows and streams each window's segments
+    as soon as it is done, instead of waiting for the whole file."""
+
+    def __init__(self, window_seconds: float = 30.0, **kwargs):
+        super().__init__(stream=True, **kwargs)
+        self.window_seconds = window_seconds
+
+    def decode_request(self, request):
+        # Keep the encoded upload; predict decodes it window by window
+        return request["audio"].file.read()
+
+    def predict(self, audio_bytes):
+        offset = 0.0
+        previous_text = None
+        for window in iter_audio_windows(audio_bytes, self.window_seconds):
+            speech, timeline = self.remove_silence(window)
+            if len(speech):
+                result = self.model.transcribe(
+                    speech, language="en", initial_prompt=previous_text
+                )
+                for segment in result["segments"]:
+                    start, end = segment["start"], segment["end"]
+                    if timeline is not None:
+                        # Timestamps are relative to the speech-only audio
+                        start = timeline.to_original(start)
+                        end = timeline.to_original(end, is_end=True)
+                    yield {
+                        "start": round(offset + start, 2),
+                        "end": round(offset + end, 2),
+                        "text": segment["text"],
+                    }
+                # Carry context across window boundaries
+                previous_text = result["text"] or None
+            offset += len(window) / SAMPLE_RATE
 
     def encode_response(self, output):
-        return {"text": output["text"]}
+        yield from output
 
 
 if __name__ == "__main__":
-    api = WhisperAPI(api_path="/transcribe")
-    server = ls.LitServer(api, timeout=60)
+    api = WhisperAPI(
+        api_path="/transcribe",
+        max_batch_size=8,
+        batch_timeout=0.05,
+        skip_silence=True,
+    )
+    streaming_api = WhisperStreamingAPI(
+        api_path="/transcribe/stream", skip_silence=True
+    )
+    server = ls.LitServer([api, streaming_api], timeout=60)
     server.run(port=8000)
@@ -0,0 +1,70 @@
+"""Throughput benchmark for /transcribe with many short clips.
+
+Cuts nova.wav into short WAV clips and sends them concurrently. Start the
+server with ``max_batch_size=1`` and again with the default batching to
+compare. Run from the whisper-stt-api folder:
+
+    python tests/benchmark.py
+"""
+
+import concurrent.futures
+import io
+import os
+import time
+
+import numpy as np
+import requests
+import soundfile as sf
+
+SERVER_URL = os.getenv("SERVER_URL", "http://localhost:8000/transcribe")
+SAMPLE_FILE = os.path.join(os.path.dirname(__file__), "..", "nova.wav")
+
+
+def make_clips(num_clips: int, min_seconds: float = 3.0, max_seconds: float = 9.0):
+    """Random excerpts of the sample recording, encoded as WAV bytes."""
+    audio, sample_rate = sf.read(SAMPLE_FILE, dtype="float32")
+    rng = np.random.default_rng(0)
+    clips = []
+    for _ in range(num_clips):
+        length = int(rng.uniform(min_seconds, max_seconds) * sample_rate)
+        length = min(length, len(audio))
+        start = rng.integers(0, len(audio) - length + 1)
+        buffer = io.BytesIO()
+        sf.write(buffer, audio[start : start + length], sample_rate, format="WAV")
+        clips.append(buffer.getvalue())
+    return clips
+
+
+def send_request(clip: bytes):
+    start_time = time.time()
+    try:
+        response = requests.post(SERVER_URL, files={"audio": ("clip.wav", clip)})
+        status_code = response.status_code
+    except requests.RequestException:
+        status_code = 500
+    return time.time() - start_time, status_code
+
+
+def benchmark(num_clips: int = 200, concurrency: int = 32) -> dict:
+    clips = make_clips(num_clips)
+    start_time = time.time()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(send_request, clip) for clip in clips]
+        results = [future.result() for future in futures]
+    total_time = time.time() - start_time
+
+    latencies = sorted(latency for latency, _ in results)
+    return {
+        "Total Clips": num_clips,
+        "Concurrency": concurrency,
+        "Failed Requests": sum(status != 200 for _, status in results),
+        "Clips Per Second": num_clips / total_time,
+        "P50 Latency (ms)": latencies[len(latencies) // 2] * 1000,
+        "P95 Latency (ms)": latencies[int(len(latencies) * 0.95)] * 1000,
+    }
+
+
+if __name__ == "__main__":
+    benchmark(num_clips=16, concurrency=8)  # warm up
+    for key, value in benchmark().items():
+        print(f"{key}: {value}")
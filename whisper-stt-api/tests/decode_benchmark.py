@@ -0,0 +1,116 @@
+"""Micro-benchmark of in-memory audio decoding against the previous temp file
++ ffmpeg subprocess path.
+
+For each format, reports the median decode latency and the median peak RSS
+added per decode, measured in a fresh process per path. ffmpeg's own peak RSS
+is reported separately. Linux only (reads /proc/self/status). Run from the
+whisper-stt-api folder:
+
+    python tests/decode_benchmark.py
+"""
+
+import io
+import multiprocessing as mp
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+import soundfile as sf
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from audio import decode_audio
+from whisper.audio import load_audio
+
+SAMPLE_FILE = os.path.join(os.path.dirname(__file__), "..", "nova.wav")
+DURATION_SECONDS = 60
+REPEATS = 20
+
+
+def ffmpeg_decode(data: bytes) -> np.ndarray:
+    """The previous decode path: write the upload to disk and run ffmpeg."""
+    with tempfile.NamedTemporaryFile() as temp_file:
+        temp_file.write(data)
+        temp_file.flush()
+        return load_audio(temp_file.name)
+
+
+PATHS = {"in-memory": decode_audio, "ffmpeg": ffmpeg_decode}
+
+
+def make_samples() -> dict:
+    """Loop the sample recording to DURATION_SECONDS and encode it in each
+    format."""
+    audio, sample_rate = sf.read(SAMPLE_FILE, dtype="float32")
+    repeats = int(np.ceil(DURATION_SECONDS * sample_rate / len(audio)))
+    audio = np.tile(audio, repeats)[: DURATION_SECONDS * sample_rate]
+
+    samples = {}
+    for fmt in ("WAV", "FLAC", "OGG", "MP3"):
+        buffer = io.BytesIO()
+        with sf.SoundFile(buffer, "w", sample_rate, 1, format=fmt) as f:
+            for start in range(0, len(audio), sample_rate):
+                f.write(audio[start : start + sample_rate])
+        samples[fmt.lower()] = buffer.getvalue()
+    return samples
+
+
+def status_mb(field: str) -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1]) / 1024  # kB
+    raise KeyError(field)
+
+
+def reset_peak_rss():
+    with open("/proc/self/clear_refs", "w") as f:
+        f.write("5")  # resets VmHWM to the current RSS
+
+
+def run_path(path: str, data: bytes, results: mp.Queue):
+    decode = PATHS[path]
+    decode(data)  # warm up
+    latencies, peaks = [], []
+    for _ in range(REPEATS):
+        reset_peak_rss()
+        rss = status_mb("VmRSS")
+        start = time.perf_counter()
+        decode(data)
+        latencies.append((time.perf_counter() - start) * 1000)
+        peaks.append(status_mb("VmHWM") - rss)
+    results.put(
+        {
+            "latency_ms": statistics.median(latencies),
+            "rss_mb": statistics.median(peaks),
+            "ffmpeg_rss_mb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+            / 1024,
+        }
+    )
+
+
+def benchmark(path: str, data: bytes) -> dict:
+    ctx = mp.get_context("spawn")
+    results = ctx.Queue()
+    process = ctx.Process(target=run_path, args=(path, data, results))
+    process.start()
+    metrics = results.get()
+    process.join()
+    return metrics
+
+
+if __name__ == "__main__":
+    samples = make_samples()
+    print(f"{DURATION_SECONDS} s of audio, median of {REPEATS} decodes")
+    print(f"{'format':<8}{'path':<12}{'latency ms':>12}{'rss MB':>10}{'ffmpeg MB':>11}")
+    for fmt, data in samples.items():
+        for path in PATHS:
+            metrics = benchmark(path, data)
+            print(
+                f"{fmt:<8}{path:<12}{metrics['latency_ms']:>12.1f}"
+                f"{metrics['rss_mb']:>10.1f}{metrics['ffmpeg_rss_mb']:>11.1f}"
+            )
@@ -0,0 +1,109 @@
+"""Energy-based voice activity detection for skipping silence before
+transcription."""
+
+from typing import Tuple
+
+import numpy as np
+from whisper.audio import SAMPLE_RATE
+
+
+class SpeechTimeline:
+    """Maps timestamps in speech-only audio back to the original recording.
+
+    Args:
+        spans: ``(n, 2)`` array of ``[start, end)`` sample indices of the kept
+            speech, in order.
+        total_samples: Length of the original recording in samples.
+    """
+
+    def __init__(self, spans: np.ndarray, total_samples: int):
+        self.spans = spans
+        lengths = spans[:, 1] - spans[:, 0]
+        self._compact_starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+        self.speech_samples = int(lengths.sum())
+        self.skipped_seconds = (total_samples - self.speech_samples) / SAMPLE_RATE
+
+    def to_original(self, seconds: float, is_end: bool = False) -> float:
+        """Convert a time in the speech-only audio to the original timeline.
+
+        A time on the boundary between two spans maps to the end of the
+        earlier span when ``is_end`` is set, and to the start of the later one
+        otherwise.
+        """
+        if len(self.spans) == 0:
+            return seconds
+        sample = seconds * SAMPLE_RATE
+        side = "left" if is_end else "right"
+        index = max(np.searchsorted(self._compact_starts, sample, side=side) - 1, 0)
+        original = self.spans[index, 0] + sample - self._compact_starts[index]
+        return float(original) / SAMPLE_RATE
+
+
+def detect_speech(
+    audio: np.ndarray,
+    frame_seconds: float = 0.03,
+    dynamic_range_db: float = 35.0,
+    floor_db: float = -50.0,
+    min_speech_seconds: float = 0.1,
+    min_silence_seconds: float = 0.5,
+    padding_seconds: float = 0.2,
+) -> np.ndarray:
+    """Find speech in 16 kHz audio from the energy of short frames.
+
+    A frame counts as speech when its energy is within ``dynamic_range_db`` of
+    the loudest frame and above ``floor_db`` dBFS. Bursts shorter than
+    ``min_speech_seconds`` are dropped, pauses shorter than
+    ``min_silence_seconds`` are kept, and every span is padded by
+    ``padding_seconds`` on both sides.
+
+    Returns:
+        ``(n, 2)`` array of ``[start, end)`` sample indices.
+    """
+    frame = int(frame_seconds * SAMPLE_RATE)
+    num_frames = len(audio) // frame
+    if num_frames == 0:
+        # Too short to judge, so keep whatever there is
+        spans = [[0, len(audio)]] if len(audio) else []
+        return np.array(spans, dtype=np.int64).reshape(-1, 2)
+
+    frames = audio[: num_frames * frame].reshape(num_frames, frame)
+    energy_db = 10 * np.log10(np.mean(frames**2, axis=1) + 1e-10)
+    threshold = max(energy_db.max() - dynamic_range_db, floor_db)
+    is_speech = np.concatenate([[False], energy_db > threshold, [False]])
+
+    edges = np.diff(is_speech.astype(np.int8))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+
+    keep = ends - starts >= min_speech_seconds / frame_seconds
+    starts, ends = starts[keep], ends[keep]
+    if len(starts) == 0:
+        return np.empty((0, 2), dtype=np.int64)
+
+    # Merge spans separated by short pauses
+    long_gap = starts[1:] - ends[:-1] >= min_silence_seconds / frame_seconds
+    starts = np.concatenate([starts[:1], starts[1:][long_gap]])
+    ends = np.concatenate([ends[:-1][long_gap], ends[-1:]])
+
+    # Padding never exceeds half the minimum gap, so spans cannot overlap
+    padding = int(min(padding_seconds, min_silence_seconds / 2) * SAMPLE_RATE)
+    spans = np.stack([starts * frame - padding, ends * frame + padding], axis=1)
+    if ends[-1] == num_frames:
+        # Keep the samples after the last full frame too
+        spans[-1, 1] = len(audio)
+    return np.clip(spans, 0, len(audio))
+
+
+def drop_silence(audio: np.ndarray, **kwargs) -> Tuple[np.ndarray, SpeechTimeline]:
+    """Keep only the speech in ``audio``.
+
+    Returns the concatenated speech and a timeline that maps its timestamps
+    back to ``audio``. Keyword arguments are passed to :func:`detect_speech`.
+    """
+    spans = detect_speech(audio, **kwargs)
+    speech = (
+        np.concatenate([audio[start:end] for start, end in spans])
+        if len(spans)
+        else audio[:0]
+    )
+    return speech, SpeechTimeline(spans, len(audio))